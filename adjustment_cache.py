@@ -0,0 +1,197 @@
+"""
+adjustment_cache.py
+
+調整結果の事前計算テーブル（adjustment_cache）の作成・参照。
+step2 の取り込み後に全キャラ分を作り、アプリ／API は
+(character, total) の索引を 1 回引くだけで単発技・2 技の候補を得る。
+
+キャラごとに元データ（name, total）のハッシュを adjustment_cache_meta に
+持ち、frame_data と食い違っていれば作り直す。
+Streamlit には依存しない（step2 から import するため）。
+"""
+
+import hashlib
+
+from adjustment_solver import NO_MATCH, MoveTable, TotalIndex, format_result
+from frame_metrics import METRICS
+
+# 事前計算する合計フレームの範囲（この範囲外のクエリはその場で計算する）
+ADJUSTMENT_CACHE_MIN_TOTAL = 0
+ADJUSTMENT_CACHE_MAX_TOTAL = 120
+
+
+def ensure_adjustment_cache_tables(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS adjustment_cache(
+            character  TEXT NOT NULL,
+            total      INTEGER NOT NULL,
+            n_moves    INTEGER NOT NULL,
+            first_pos  INTEGER NOT NULL,
+            second_pos INTEGER,
+            label      TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_adjustment_cache_lookup
+        ON adjustment_cache(character, total, n_moves, first_pos, second_pos, label)
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS adjustment_cache_meta(
+            character   TEXT PRIMARY KEY,
+            source_hash TEXT NOT NULL,
+            min_total   INTEGER NOT NULL,
+            max_total   INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def load_move_table(conn, character) -> MoveTable:
+    rows = conn.execute(
+        f"""
+        SELECT {', '.join(f'f.{col}' for col in MoveTable.COLUMNS)}
+        FROM frame_data f JOIN characters c ON c.id = f.character_id
+        WHERE c.name = ?
+        ORDER BY f.sheet_order
+        """,
+        (character,),
+    )
+    return MoveTable.from_rows(rows)
+
+
+def load_total_index(conn, character) -> TotalIndex:
+    return TotalIndex.from_table(load_move_table(conn, character))
+
+
+def source_hash(index: TotalIndex) -> str:
+    digest = hashlib.sha1()
+    for name, total in zip(index.names, index.totals):
+        digest.update(f"{name}\t{total}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def is_adjustment_cache_fresh(conn, character, index: TotalIndex) -> bool:
+    row = conn.execute(
+        "SELECT source_hash, min_total, max_total FROM adjustment_cache_meta WHERE character = ?",
+        (character,),
+    ).fetchone()
+    return row == (source_hash(index), ADJUSTMENT_CACHE_MIN_TOTAL, ADJUSTMENT_CACHE_MAX_TOTAL)
+
+
+def rebuild_adjustment_cache(conn, character, index: TotalIndex = None):
+    """1 キャラ分の単発技・2 技の組み合わせを作り直す（commit は呼び出し側）"""
+    if index is None:
+        index = load_total_index(conn, character)
+    lo, hi = ADJUSTMENT_CACHE_MIN_TOTAL, ADJUSTMENT_CACHE_MAX_TOTAL
+    names, totals = index.names, index.totals
+
+    rows = [(character, totals[i], 1, i, None, names[i]) for i in index.singles(lo, hi)]
+    rows.extend(
+        (
+            character,
+            totals[i] + totals[j],
+            2,
+            i,
+            j,
+            f"{names[i]} ({totals[i]}F) + {names[j]} ({totals[j]}F)",
+        )
+        for i, j in index.pairs(lo, hi)
+    )
+
+    conn.execute("DELETE FROM adjustment_cache WHERE character = ?", (character,))
+    conn.executemany(
+        """
+        INSERT INTO adjustment_cache (character, total, n_moves, first_pos, second_pos, label)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO adjustment_cache_meta (character, source_hash, min_total, max_total)
+        VALUES (?, ?, ?, ?)
+        """,
+        (character, source_hash(index), lo, hi),
+    )
+    METRICS.inc("adjustment_cache_rows_total", len(rows))
+    return len(rows)
+
+
+def refresh_adjustment_cache(conn, characters=None):
+    """ハッシュが合わないキャラだけ作り直し、作り直したキャラ名を返す"""
+    ensure_adjustment_cache_tables(conn)
+    if characters is None:
+        characters = [
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM characters WHERE id IN (SELECT character_id FROM frame_data) ORDER BY name"
+            )
+        ]
+    rebuilt = []
+    for character in characters:
+        index = load_total_index(conn, character)
+        if not is_adjustment_cache_fresh(conn, character, index):
+            rebuild_adjustment_cache(conn, character, index)
+            rebuilt.append(character)
+    present = "SELECT name FROM characters WHERE id IN (SELECT character_id FROM frame_data)"
+    conn.execute(f"DELETE FROM adjustment_cache WHERE character NOT IN ({present})")
+    conn.execute(f"DELETE FROM adjustment_cache_meta WHERE character NOT IN ({present})")
+    return rebuilt
+
+
+def covers(required_total, tolerance_plus) -> bool:
+    return (
+        ADJUSTMENT_CACHE_MIN_TOTAL <= required_total
+        and required_total + tolerance_plus <= ADJUSTMENT_CACHE_MAX_TOTAL
+    )
+
+
+def _merge_windows(windows):
+    """[lo, hi] の区間を重なり・隣接ごとにまとめる（昇順）"""
+    merged = []
+    for lo, hi in sorted(windows):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def lookup_adjustments_batch(conn, character, queries):
+    """[(required_total, tolerance_plus), ...] をまとめて引く
+
+    クエリの [required, required+tolerance] を重なりごとにまとめ、区間ごとに索引の範囲検索を
+    1 回ずつ行う（該当する行だけを読む）。
+    結果は search_adjustments と同じ並び・書式。範囲外のクエリは None。
+    """
+    windows = {(req, req + tol) for req, tol in queries if req >= 0 and covers(req, tol)}
+    rows_by_total = {}
+    for lo, hi in _merge_windows(windows):
+        for total, n_moves, first_pos, second_pos, label in conn.execute(
+            """
+            SELECT total, n_moves, first_pos, second_pos, label
+            FROM adjustment_cache
+            WHERE character = ? AND total BETWEEN ? AND ?
+            """,
+            (character, lo, hi),
+        ):
+            rows_by_total.setdefault(total, []).append(((n_moves, first_pos, second_pos or 0), label, total))
+
+    results = []
+    for req, tol in queries:
+        if req < 0:
+            results.append([NO_MATCH])
+        elif not covers(req, tol):
+            results.append(None)
+        else:
+            hits = []
+            for total in range(req, req + tol + 1):
+                hits.extend(rows_by_total.get(total, ()))
+            hits.sort()
+            results.append([format_result(label, total, req) for _, label, total in hits] or [NO_MATCH])
+    return results
@@ -0,0 +1,517 @@
+"""
+adjustment_solver.py
+
+詐欺重ね調整（空振り技で有利フレームを埋める）の探索ロジック。
+Streamlit / SQLite に依存しない純粋な計算部分だけをまとめる。
+"""
+
+import heapq
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from itertools import chain, combinations, combinations_with_replacement, product
+
+import numpy as np
+
+NO_MATCH = "該当なし"
+
+# 技の種類ごとの減点（空振りで安全に使える通常技を優先する）
+MOVE_KIND_PENALTY = {"normal": 0, "movement": 1, "special": 2, "super": 3}
+
+# おすすめ順のスコア = 技数・ずれ・種類の減点の重み付き和 − お気に入りの加点（小さいほど上位）
+RANK_WEIGHTS = {"moves": 10, "distance": 3, "kind": 2, "favourite": 15}
+
+# MoveTable.total で「値なし」を表す値
+MISSING = np.iinfo(np.int16).min
+
+# MoveTable.kind の番号 → 技の種類
+KIND_CODES = ("normal", "movement", "special", "super")
+
+_SUPER_PATTERN = re.compile(r"236236|214214|REV|\+R$")
+_SPECIAL_PATTERN = re.compile(r"[1-9]{3,}|22")
+_MOVEMENT_PATTERN = re.compile(r"dash|jump|hop|step", re.IGNORECASE)
+
+
+def format_result(desc: str, total: int, required: int) -> str:
+    diff = total - required
+    return f"{desc} ({total}F)(+{diff}F)"
+
+
+def move_kind(name, cancel=None) -> str:
+    """技名（と cancel 列）から normal / movement / special / super を推定する"""
+    name = str(name)
+    if _SUPER_PATTERN.search(name):
+        return "super"
+    if _SPECIAL_PATTERN.search(name) or (isinstance(cancel, str) and "stance" in cancel):
+        return "special"
+    if _MOVEMENT_PATTERN.search(name):
+        return "movement"
+    return "normal"
+
+
+class MoveTable:
+    """1 キャラ分の技（TotalIndex を作るための読み込み結果。行順は frame_data の sheet_order 順）
+
+    total は int16 の NumPy 配列（値なしは MISSING）、技名は intern した tuple、
+    技の種類は KIND_CODES の番号（uint8）。行ごとのオブジェクトや DataFrame は作らない。
+    """
+
+    __slots__ = ("names", "total", "kind")
+
+    # from_rows が受け取る行の列順
+    COLUMNS = ("name", "total", "cancel")
+
+    def __init__(self, names, total, kind):
+        self.names = names
+        self.total = total
+        self.kind = kind
+
+    @classmethod
+    def from_rows(cls, rows):
+        """COLUMNS 順の行（SQLite のカーソルなど）から作る"""
+        rows = list(rows)
+        names = tuple(sys.intern(str(r[0])) for r in rows)
+        total = np.fromiter(
+            (MISSING if r[1] is None or r[1] != r[1] else int(r[1]) for r in rows),
+            dtype=np.int16,
+            count=len(rows),
+        )
+        kind = np.fromiter(
+            (KIND_CODES.index(move_kind(name, r[2])) for name, r in zip(names, rows)),
+            dtype=np.uint8,
+            count=len(rows),
+        )
+        return cls(names, total, kind)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class TotalIndex:
+    """1 キャラ分の技を total ごとにバケット化した索引
+
+    位置（pos）は total のある技だけを行順に詰めた番号。ペア探索はウィンドウに合計が
+    入り得る total のバケットだけを参照するので、全ペア列挙はしない。
+    """
+
+    def __init__(self, moves, cancels=None, kinds=None):
+        self.names = []
+        self.totals = []
+        self.buckets = {}
+        for name, total in moves:
+            total = int(total)
+            self.buckets.setdefault(total, []).append(len(self.totals))
+            self.names.append(name)
+            self.totals.append(total)
+        self.distinct_totals = sorted(self.buckets)
+        if kinds is None:
+            if cancels is None:
+                cancels = [None] * len(self.names)
+            kinds = [move_kind(name, cancel) for name, cancel in zip(self.names, cancels)]
+        self.kinds = kinds
+        self._single_table = None
+        self._pair_table = None
+
+    @classmethod
+    def from_table(cls, table: MoveTable):
+        """total のある技だけで作る（技の種類は MoveTable で判定済みのものを使う）"""
+        positions = np.flatnonzero(table.total != MISSING).tolist()
+        names = [table.names[p] for p in positions]
+        kinds = [KIND_CODES[k] for k in table.kind[positions].tolist()]
+        return cls(zip(names, table.total[positions].tolist()), kinds=kinds)
+
+    def __len__(self):
+        return len(self.totals)
+
+    def totals_between(self, lo, hi):
+        """[lo, hi] に入る total（昇順・重複なし）"""
+        start = bisect_left(self.distinct_totals, lo)
+        stop = bisect_right(self.distinct_totals, hi)
+        return self.distinct_totals[start:stop]
+
+    def singles(self, lo, hi):
+        """total が [lo, hi] に入る技の位置（行順）"""
+        hits = []
+        for t in self.totals_between(lo, hi):
+            hits.extend(self.buckets[t])
+        return sorted(hits)
+
+    def pairs(self, lo, hi):
+        """合計が [lo, hi] に入る (i, j) (i < j) を combinations と同じ順で返す"""
+        return list(self.iter_pairs(lo, hi))
+
+    def iter_pairs(self, lo, hi):
+        """pairs() の遅延版"""
+        if not self.distinct_totals:
+            return
+        max_first = hi - self.distinct_totals[0]
+        for i, t in enumerate(self.totals):
+            if t > max_first:
+                continue
+            partners = []
+            for u in self.totals_between(lo - t, hi - t):
+                bucket = self.buckets[u]
+                partners.extend(bucket[bisect_right(bucket, i):])
+            partners.sort()
+            for j in partners:
+                yield i, j
+
+    def single_table(self):
+        """(total 昇順の位置, 並べ替え後の total) — バッチ探索用"""
+        if self._single_table is None:
+            totals = np.asarray(self.totals, dtype=np.int64)
+            order = np.argsort(totals, kind="stable")
+            self._single_table = (order, totals[order])
+        return self._single_table
+
+    def pair_table(self):
+        """全ペア (i < j) の合計を外和で一度だけ計算し、合計順に並べたもの
+
+        戻り値の order はペア番号（triu_indices の並び = combinations 順）。
+        """
+        if self._pair_table is None:
+            totals = np.asarray(self.totals, dtype=np.int64)
+            first, second = np.triu_indices(len(totals), k=1)
+            sums = (totals[:, None] + totals[None, :])[first, second]
+            order = np.argsort(sums, kind="stable")
+            self._pair_table = (order, sums[order], first, second)
+        return self._pair_table
+
+
+def _format_pair(index, i, j, required_total):
+    names, totals = index.names, index.totals
+    return format_result(
+        f"{names[i]} ({totals[i]}F) + {names[j]} ({totals[j]}F)",
+        totals[i] + totals[j],
+        required_total,
+    )
+
+
+def format_adjustment(index, combo, required_total):
+    """位置のタプル（単発技 (i,)・2 技 (i, j)）を表示用の 1 行にする"""
+    if len(combo) == 1:
+        i = combo[0]
+        return format_result(index.names[i], index.totals[i], required_total)
+    return _format_pair(index, combo[0], combo[1], required_total)
+
+
+def search_adjustments(index: TotalIndex, required_total: int, tolerance_plus: int = 0):
+    """required_total〜required_total+tolerance_plus に収まる単発技・2 技の組み合わせ"""
+    if required_total < 0:
+        return [NO_MATCH]
+
+    min_total, max_total = required_total, required_total + tolerance_plus
+    names, totals = index.names, index.totals
+
+    single_results = [
+        format_result(names[i], totals[i], required_total)
+        for i in index.singles(min_total, max_total)
+    ]
+    pair_results = [
+        _format_pair(index, i, j, required_total)
+        for i, j in index.pairs(min_total, max_total)
+    ]
+
+    return single_results + pair_results if single_results or pair_results else [NO_MATCH]
+
+
+def _window_bounds(index: TotalIndex, required_totals, tolerances):
+    required = np.asarray(required_totals, dtype=np.int64).reshape(-1)
+    upper = required + np.broadcast_to(np.asarray(tolerances, dtype=np.int64), required.shape)
+
+    _, single_sums = index.single_table()
+    _, pair_sums, _, _ = index.pair_table()
+    single_bounds = (
+        np.searchsorted(single_sums, required, side="left"),
+        np.searchsorted(single_sums, upper, side="right"),
+    )
+    pair_bounds = (
+        np.searchsorted(pair_sums, required, side="left"),
+        np.searchsorted(pair_sums, upper, side="right"),
+    )
+    return required, single_bounds, pair_bounds
+
+
+def count_adjustments_batch(index: TotalIndex, required_totals, tolerances=0):
+    """単発・2 技の該当件数だけを返す（文字列は作らない）"""
+    required, (single_start, single_stop), (pair_start, pair_stop) = _window_bounds(
+        index, required_totals, tolerances
+    )
+    counts = (single_stop - single_start) + (pair_stop - pair_start)
+    counts[required < 0] = 0
+    return counts.tolist()
+
+
+def adjustment_positions_batch(index: TotalIndex, required_totals, tolerances=0, limits=None):
+    """search_adjustments_batch の探索部分。各クエリの該当を位置のタプルの列で返す
+
+    並びは search_adjustments と同じ（単発技 → 2 技）。required_total < 0 のクエリは空。
+    limits を渡すと各クエリの先頭 limits[q] 件だけを返す。
+    """
+    required, (single_start, single_stop), (pair_start, pair_stop) = _window_bounds(
+        index, required_totals, tolerances
+    )
+    single_order, _ = index.single_table()
+    pair_order, _, first, second = index.pair_table()
+
+    results = []
+    for q, required_total in enumerate(required.tolist()):
+        if required_total < 0:
+            results.append([])
+            continue
+        limit = None if limits is None else limits[q]
+        singles = np.sort(single_order[single_start[q]:single_stop[q]])[:limit]
+        combos = [(i,) for i in singles.tolist()]
+        if limit is None or len(combos) < limit:
+            pairs = np.sort(pair_order[pair_start[q]:pair_stop[q]])
+            if limit is not None:
+                pairs = pairs[:limit - len(combos)]
+            combos.extend(zip(first[pairs].tolist(), second[pairs].tolist()))
+        results.append(combos)
+    return results
+
+
+def search_adjustments_batch(index: TotalIndex, required_totals, tolerances=0, limits=None):
+    """複数の required_total をまとめて解く（結果は search_adjustments と同一）
+
+    tolerances はスカラーまたは required_totals と同じ長さの列。
+    ウィンドウの境界は searchsorted で全クエリ分を一度に求める。
+    limits を渡すと各クエリの先頭 limits[q] 件だけを文字列にする。
+    """
+    required = np.asarray(required_totals, dtype=np.int64).reshape(-1).tolist()
+    positions = adjustment_positions_batch(index, required, tolerances, limits)
+    return [
+        [format_adjustment(index, combo, required_total) for combo in combos] or [NO_MATCH]
+        for required_total, combos in zip(required, positions)
+    ]
+
+
+class SequenceSearch:
+    """最大 max_moves 個の技で合計を [min_total, max_total] に収める組み合わせを遅延列挙
+
+    技数の少ない順・行順（combinations と同じ並び）に位置のタプルを返す。
+    allow_repeat=True なら同じ技を複数回使う組み合わせも含める。
+    部分和の到達可能性をビットセットの DP で前計算し、解に届かない枝は辿らない。
+    max_results 件または time_limit 秒に達したら打ち切り、truncated を立てる。
+    total が負の技は対象外。
+    """
+
+    def __init__(
+        self,
+        index: TotalIndex,
+        min_total: int,
+        max_total: int,
+        max_moves: int = 3,
+        allow_repeat: bool = False,
+        max_results: int = 100,
+        time_limit: float = 0.2,
+    ):
+        self.index = index
+        self.min_total = max(min_total, 0)
+        self.max_total = max_total
+        self.max_moves = max_moves
+        self.allow_repeat = allow_repeat
+        self.max_results = max_results
+        self.time_limit = time_limit
+        self.truncated = False
+        self._positions = [p for p, t in enumerate(index.totals) if 0 <= t <= max_total]
+        self._reach = self._build_reach() if max_total >= 0 else None
+
+    def _build_reach(self):
+        # reach[k][m]: _positions[k:] から m 個選んだときに作れる合計のビットセット
+        mask = (1 << (self.max_total + 1)) - 1
+        totals = self.index.totals
+        reach = [None] * (len(self._positions) + 1)
+        reach[-1] = [1] + [0] * self.max_moves
+        for k in range(len(self._positions) - 1, -1, -1):
+            t = totals[self._positions[k]]
+            below = reach[k + 1]
+            row = [1]
+            for m in range(1, self.max_moves + 1):
+                source = row[m - 1] if self.allow_repeat else below[m - 1]
+                row.append((below[m] | (source << t)) & mask)
+            reach[k] = row
+        return reach
+
+    def _reachable(self, k, moves, lo, hi):
+        if hi < 0 or k >= len(self._positions) and moves > 0:
+            return False
+        lo = max(lo, 0)
+        bits = self._reach[k][moves] >> lo
+        return bits & ((1 << (hi - lo + 1)) - 1) != 0
+
+    def __iter__(self):
+        if self._reach is None or self.min_total > self.max_total:
+            return
+        deadline = time.monotonic() + self.time_limit
+        found = 0
+        for moves in range(1, self.max_moves + 1):
+            for combo in self._walk(0, moves, self.min_total, self.max_total, (), deadline):
+                if combo is None:
+                    self.truncated = True
+                    return
+                yield combo
+                found += 1
+                if found >= self.max_results:
+                    self.truncated = True
+                    return
+
+    def _walk(self, start, moves, lo, hi, chosen, deadline):
+        if moves == 0:
+            yield chosen
+            return
+        totals = self.index.totals
+        for k in range(start, len(self._positions)):
+            if time.monotonic() > deadline:
+                yield None
+                return
+            pos = self._positions[k]
+            t = totals[pos]
+            rest = k if self.allow_repeat else k + 1
+            if not self._reachable(rest, moves - 1, lo - t, hi - t):
+                continue
+            for combo in self._walk(rest, moves - 1, lo - t, hi - t, chosen + (pos,), deadline):
+                yield combo
+                if combo is None:
+                    return
+
+
+def search_adjustment_sequences(
+    index: TotalIndex,
+    required_total: int,
+    tolerance_plus: int = 0,
+    max_moves: int = 3,
+    allow_repeat: bool = False,
+    max_results: int = 100,
+    time_limit: float = 0.2,
+):
+    """SequenceSearch の結果を表示用の文字列にしたもの（打ち切り有無も返す）"""
+    if required_total < 0:
+        return [NO_MATCH], False
+
+    names, totals = index.names, index.totals
+    search = SequenceSearch(
+        index,
+        required_total,
+        required_total + tolerance_plus,
+        max_moves=max_moves,
+        allow_repeat=allow_repeat,
+        max_results=max_results,
+        time_limit=time_limit,
+    )
+    lines = []
+    for combo in search:
+        if len(combo) == 1:
+            desc = names[combo[0]]
+        else:
+            desc = " + ".join(f"{names[p]} ({totals[p]}F)" for p in combo)
+        lines.append(format_result(desc, sum(totals[p] for p in combo), required_total))
+    return lines or [NO_MATCH], search.truncated
+
+
+class TotalClassMatch:
+    """total が同じ技を 1 クラスにまとめた候補（展開前）
+
+    totals は 1 技なら (t,)、2 技なら (a, b) (a <= b)。
+    具体的な組み合わせは expand() を呼んだときだけ作る。
+    """
+
+    def __init__(self, index: TotalIndex, totals, allow_repeat=False):
+        self.index = index
+        self.totals = totals
+        self.allow_repeat = allow_repeat
+
+    @property
+    def total(self):
+        return sum(self.totals)
+
+    def count(self):
+        """展開したときの組み合わせ数"""
+        sizes = [len(self.index.buckets[t]) for t in self.totals]
+        if len(sizes) == 1:
+            return sizes[0]
+        if self.totals[0] != self.totals[1]:
+            return sizes[0] * sizes[1]
+        n = sizes[0]
+        return n * (n + 1) // 2 if self.allow_repeat else n * (n - 1) // 2
+
+    def _class_label(self, t):
+        names = [self.index.names[p] for p in self.index.buckets[t]]
+        return names[0] if len(names) == 1 else "{" + ", ".join(names) + "}"
+
+    def label(self, required_total):
+        if len(self.totals) == 1:
+            desc = self._class_label(self.totals[0])
+        else:
+            desc = " + ".join(f"{self._class_label(t)} ({t}F)" for t in self.totals)
+        return format_result(desc, self.total, required_total)
+
+    def expand(self, required_total):
+        buckets = self.index.buckets
+        if len(self.totals) == 1:
+            return [format_result(self.index.names[p], self.total, required_total) for p in buckets[self.totals[0]]]
+        a, b = self.totals
+        if a != b:
+            pairs = sorted((min(i, j), max(i, j)) for i, j in product(buckets[a], buckets[b]))
+        elif self.allow_repeat:
+            pairs = list(combinations_with_replacement(buckets[a], 2))
+        else:
+            pairs = list(combinations(buckets[a], 2))
+        return [_format_pair(self.index, i, j, required_total) for i, j in pairs]
+
+
+def search_total_classes(
+    index: TotalIndex, required_total: int, tolerance_plus: int = 0, max_moves: int = 2, allow_repeat: bool = False
+):
+    """同じ total の技をまとめたまま単発・2 技の候補を探す（直積は作らない）"""
+    if required_total < 0:
+        return []
+    lo, hi = required_total, required_total + tolerance_plus
+    matches = [TotalClassMatch(index, (t,)) for t in index.totals_between(lo, hi)]
+    if max_moves < 2:
+        return matches
+    for a in index.distinct_totals:
+        if 2 * a > hi:
+            break
+        for b in index.totals_between(max(a, lo - a), hi - a):
+            if a == b and len(index.buckets[a]) < 2 and not allow_repeat:
+                continue
+            matches.append(TotalClassMatch(index, (a, b), allow_repeat))
+    return matches
+
+
+def rank_adjustments(
+    index: TotalIndex,
+    required_total: int,
+    tolerance_plus: int = 0,
+    top_k: int = 5,
+    favourites=(),
+    weights=RANK_WEIGHTS,
+):
+    """単発・2 技の候補をおすすめ順に top_k 件だけ返す
+
+    候補はジェネレータのまま heapq.nsmallest に流すので、
+    全候補のリストを作って並べ替えることはしない。
+    """
+    if required_total < 0:
+        return [NO_MATCH]
+
+    lo, hi = required_total, required_total + tolerance_plus
+    favourites = set(favourites)
+    totals, kinds, names = index.totals, index.kinds, index.names
+
+    def score(combo):
+        total = sum(totals[p] for p in combo)
+        return (
+            weights["moves"] * len(combo)
+            + weights["distance"] * (total - required_total)
+            + weights["kind"] * sum(MOVE_KIND_PENALTY[kinds[p]] for p in combo)
+            - weights["favourite"] * sum(1 for p in combo if names[p] in favourites),
+            combo,
+        )
+
+    singles = ((i,) for i in index.singles(lo, hi))
+    ranked = heapq.nsmallest(top_k, chain(singles, index.iter_pairs(lo, hi)), key=score)
+
+    return [format_adjustment(index, c, required_total) for c in ranked] or [NO_MATCH]
@@ -0,0 +1,140 @@
+"""
+bench_roster.py
+
+ベンチマーク用の架空ロースター（キャラ数 × 技数 × コンボ数）を作る。
+同じ seed なら毎回同じデータになる（コミット間で結果を比べるため）。
+
+シートは Excel から読んだ直後と同じ列（Unnamed: 0 / Start / ...）の DataFrame で作るので、
+step1 の正規化からそのまま流せる。
+"""
+
+import random
+
+import pandas as pd
+
+from frame_ingest import import_characters
+from frame_migrations import migrate
+from step1_convert_excel_to_json import sheet_entry
+
+# 技名の材料（move_kind が normal / movement / special / super に振り分けられる表記）
+_BUTTONS = ["A", "B", "C", "D"]
+_NORMAL_PREFIXES = ["close ", "遠 ", "2", "air ", "j.", "6", "3"]
+_SPECIAL_MOTIONS = ["236", "214", "623", "421", "22", "41236"]
+_SUPER_MOTIONS = ["236236", "214214"]
+_MOVEMENTS = ["Short Dash", "Back Dash", "Hop", "Jump", "Side Step"]
+_CANCELS = ["//", "X", "BR", "S", "R", "X (hit only)", "---", "[to stance]"]
+_LOW_OVERHEAD = ["//", "low", "overhead", None]
+
+# 通し番号の表記に使う文字（数字や dash / hop などに化けて技の種類が変わらない文字）
+_SERIAL_LETTERS = "KLMNQSTWXYZ"
+
+
+def _advantage(rng):
+    if rng.random() < 0.1:
+        return rng.choice(["//", "KD", "---"])
+    first = rng.randint(-30, 10)
+    if rng.random() < 0.3:
+        return f"{first:+d}"
+    return f"{first:+d} / {rng.randint(-30, 10):+d}"
+
+
+def _move_name(rng, n):
+    roll = rng.random()
+    if roll < 0.55:
+        name = rng.choice(_NORMAL_PREFIXES) + rng.choice(_BUTTONS)
+    elif roll < 0.65:
+        name = rng.choice(_MOVEMENTS)
+    elif roll < 0.9:
+        name = rng.choice(_SPECIAL_MOTIONS) + rng.choice(_BUTTONS)
+    else:
+        name = rng.choice(_SUPER_MOTIONS) + rng.choice(_BUTTONS)
+    # 技数が多いときも同名だらけにならないよう通し番号を付ける
+    return f"{name} ({_serial(n)})" if n >= 40 else name
+
+
+def _serial(n):
+    letters = ""
+    while True:
+        n, r = divmod(n, len(_SERIAL_LETTERS))
+        letters = _SERIAL_LETTERS[r] + letters
+        if n == 0:
+            return letters
+
+
+def make_sheet(rng, n_moves):
+    """1 キャラ分のシート（Excel から読んだ直後の形。ターゲットコンボ行・数値でない Total も混ぜる）"""
+    rows = []
+    for n in range(n_moves):
+        startup = rng.randint(3, 40)
+        if rng.random() < 0.05:
+            total = "//"
+        else:
+            total = startup + rng.randint(8, 50)
+        rows.append(
+            {
+                "Unnamed: 0": _move_name(rng, n),
+                "Start": startup,
+                "Guard": _advantage(rng),
+                "Hit": _advantage(rng),
+                "Total": total,
+                "Cancel": rng.choice(_CANCELS),
+                "Low/Overhead": rng.choice(_LOW_OVERHEAD),
+            }
+        )
+        if rng.random() < 0.05:
+            rows.append({"Unnamed: 0": "> B / D", "Start": "", "Total": ""})
+    return pd.DataFrame(rows)
+
+
+def character_names(n_characters):
+    return [f"Synthetic {i:03d}" for i in range(n_characters)]
+
+
+def make_sheets(n_characters=50, n_moves=500, seed=0):
+    """{キャラ名: シート} を作る"""
+    rng = random.Random(seed)
+    return {name: make_sheet(rng, n_moves) for name in character_names(n_characters)}
+
+
+def make_roster(sheets):
+    """シートを step1 と同じ処理に通し、import_characters に渡せる形にする"""
+    return [sheet_entry(df, name)[0] for name, df in sheets.items()]
+
+
+def make_combos(characters, n_combos=200, seed=0):
+    """(英語名, レシピ, 有利F) の列"""
+    rng = random.Random(seed + 1)
+    return [
+        (character, f"combo {n}", rng.randint(20, 90))
+        for character in characters
+        for n in range(n_combos)
+    ]
+
+
+def build_db(conn, roster, combos):
+    """空の DB にロースターとコンボを入れる（adjustment_cache は作らない。commit は呼び出し側）"""
+    migrate(conn)
+    import_characters(conn, roster)
+    # character_names は step5 と同じ定義
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS character_names (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            english_name TEXT NOT NULL,
+            japanese_name TEXT NOT NULL
+        )
+        """
+    )
+    conn.executemany(
+        """
+        INSERT INTO character_names (english_name, japanese_name) VALUES (?, ?)
+        """,
+        [(entry["character"], entry["character"]) for entry in roster],
+    )
+    conn.executemany(
+        """
+        INSERT INTO combo_data (character_id, recipe, advantage)
+        SELECT id, ?, ? FROM characters WHERE name = ?
+        """,
+        [(recipe, advantage, character) for character, recipe, advantage in combos],
+    )
@@ -0,0 +1,294 @@
+"""
+benchmark.py
+
+ソルバー・データ層・取り込み（step1 / step2）の処理時間とピークメモリを測る。
+データは bench_roster の架空ロースター（seed 固定）なので、コミット間で結果を比べられる。
+
+使い方:
+    python benchmark.py                                  # 50 キャラ × 500 技 × 200 コンボ
+    python benchmark.py --scale small                    # 手早く確認する用
+    python benchmark.py --save bench_baseline.json       # 結果を基準値として保存
+    python benchmark.py --compare bench_baseline.json    # 基準値と比べる
+    python benchmark.py --only okizeme_grid solver_search
+
+時間は repeat 回の中央値と最小値、ピークメモリは別に 1 回だけ tracemalloc で測る
+（tracemalloc を掛けたままだと時間が伸びるため）。SQLite 内部のメモリは含まない。
+default の規模では step2_ingest（adjustment_cache の作成を含む）が大半の時間を占める。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from streamlit.logger import set_log_level
+
+from adjustment_cache import load_move_table, refresh_adjustment_cache
+from adjustment_solver import TotalIndex, count_adjustments_batch, search_adjustments, search_adjustments_batch
+from bench_roster import build_db, make_combos, make_roster, make_sheets
+from frame_ingest import import_characters
+from step1_convert_excel_to_json import import_to_sqlite
+
+# (キャラ数, 1 キャラの技数, 1 キャラのコンボ数)
+SCALES = {
+    "small": (10, 100, 50),
+    "default": (50, 500, 200),
+    "large": (100, 1000, 400),
+}
+
+# 起き攻め表の列（step6 と同じ並び。自由枠は 0〜+2F 許容）
+GRID_TARGETS = [(34, 0), (41, 0), (24, 0), (8, 2), (12, 2)]
+GRID_PAGE_SIZE = 5
+
+# solver_search で解く必要 F（1 キャラあたり）
+SEARCH_TOTALS = range(10, 100, 5)
+
+# 基準値よりこの倍率以上遅い／重いものに印を付ける
+REGRESSION_RATIO = 1.2
+
+
+class Fixture:
+    """各ベンチマークが共有するデータ（作る時間は測らない）"""
+
+    def __init__(self, n_characters, n_moves, n_combos, seed, workdir):
+        self.workdir = workdir
+        self.sheets = make_sheets(n_characters, n_moves, seed)
+        self.roster = make_roster(self.sheets)
+        self.characters = [entry["character"] for entry in self.roster]
+        self.combos = make_combos(self.characters, n_combos, seed)
+        self.advantages = {}
+        for character, _, advantage in self.combos:
+            self.advantages.setdefault(character, []).append(advantage)
+
+        self.db_path = os.path.join(workdir, "frame_data.db")
+        conn = sqlite3.connect(self.db_path)
+        build_db(conn, self.roster, self.combos)
+        conn.commit()
+        self.tables = {character: load_move_table(conn, character) for character in self.characters}
+        conn.close()
+
+
+def bench_step1_normalize(fx):
+    def run():
+        make_roster(fx.sheets)
+
+    return run
+
+
+def bench_step2_ingest(fx):
+    path = os.path.join(fx.workdir, "ingest.db")
+
+    def run():
+        if os.path.exists(path):
+            os.remove(path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            import_to_sqlite(iter(fx.roster), path)
+
+    return run
+
+
+def bench_step2_noop(fx):
+    """変更のない再取り込み（ハッシュが一致するキャラは読み飛ばす）"""
+    path = os.path.join(fx.workdir, "noop.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import_to_sqlite(iter(fx.roster), path)
+
+    def run():
+        conn = sqlite3.connect(path)
+        try:
+            refresh_adjustment_cache(conn, import_characters(conn, iter(fx.roster)))
+            conn.commit()
+        finally:
+            conn.close()
+
+    return run
+
+
+def bench_total_index(fx):
+    def run():
+        for table in fx.tables.values():
+            TotalIndex.from_table(table).pair_table()
+
+    return run
+
+
+def bench_solver_search(fx):
+    """find_adjustment_moves_batch のメモ・事前計算テーブルに当たらないときの探索"""
+    indexes = [TotalIndex.from_table(table) for table in fx.tables.values()]
+
+    def run():
+        for index in indexes:
+            for required_total in SEARCH_TOTALS:
+                search_adjustments(index, required_total, 2)
+
+    return run
+
+
+def bench_okizeme_grid(fx):
+    """キャラごとにコンボ × 起き攻め先の表全体を作る（索引の作成から。各マスは先頭 1 ページ）"""
+
+    def run():
+        for character, table in fx.tables.items():
+            index = TotalIndex.from_table(table)
+            required = [adv - startup for adv in fx.advantages[character] for startup, _ in GRID_TARGETS]
+            tolerances = [tol for _ in fx.advantages[character] for _, tol in GRID_TARGETS]
+            count_adjustments_batch(index, required, tolerances)
+            search_adjustments_batch(index, required, tolerances, limits=[GRID_PAGE_SIZE] * len(required))
+
+    return run
+
+
+def _frame_db(fx):
+    # Streamlit の実行環境なしで st.cache_resource を使うときの警告を抑える
+    set_log_level("error")
+    # frame_db は import 時に DB のパスを読む
+    os.environ["GAROU_DB_PATH"] = fx.db_path
+    import frame_db
+
+    frame_db.initialize_db()
+    return frame_db
+
+
+def _read_all(frame_db, characters):
+    for character in characters:
+        frame_db.get_frame_data(character)
+        frame_db.get_frame_data(character, is_opponent=True)
+        frame_db.get_combos(character)
+
+
+def bench_frame_db_cold(fx):
+    """get_frame_data / get_combos（プロセス内キャッシュを空にしてから）"""
+    frame_db = _frame_db(fx)
+
+    def run():
+        frame_db._frame_cache.clear()
+        _read_all(frame_db, fx.characters)
+
+    return run
+
+
+def bench_frame_db_warm(fx):
+    """get_frame_data / get_combos（2 回目以降の rerun と同じくキャッシュ済み）"""
+    frame_db = _frame_db(fx)
+    _read_all(frame_db, fx.characters)
+
+    def run():
+        _read_all(frame_db, fx.characters)
+
+    return run
+
+
+BENCHMARKS = {
+    "step1_normalize": bench_step1_normalize,
+    "step2_ingest": bench_step2_ingest,
+    "step2_noop": bench_step2_noop,
+    "total_index": bench_total_index,
+    "solver_search": bench_solver_search,
+    "okizeme_grid": bench_okizeme_grid,
+    "frame_db_cold": bench_frame_db_cold,
+    "frame_db_warm": bench_frame_db_warm,
+}
+
+
+def measure(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_s": round(statistics.median(timings), 6),
+        "min_s": round(min(timings), 6),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(names, n_characters, n_moves, n_combos, seed, repeat):
+    # frame_db の接続は開いたままなので、Windows では一時フォルダを消せなくても続ける
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as workdir:
+        fx = Fixture(n_characters, n_moves, n_combos, seed, workdir)
+        results = {}
+        for name in names:
+            results[name] = measure(BENCHMARKS[name](fx), repeat)
+            print(_format_line(name, results[name]), flush=True)
+    return {
+        "params": {
+            "characters": n_characters,
+            "moves": n_moves,
+            "combos": n_combos,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def _format_line(name, result, baseline=None):
+    line = f"{name:<18} {result['median_s']:>10.4f}s (min {result['min_s']:.4f}s)  peak {result['peak_kib']:>10.1f} KiB"
+    if baseline is not None:
+        ratios = [result[key] / baseline[key] if baseline[key] else 1.0 for key in ("median_s", "peak_kib")]
+        marks = ["⚠" if r >= REGRESSION_RATIO else " " for r in ratios]
+        line += f"   time ×{ratios[0]:.2f}{marks[0]}  peak ×{ratios[1]:.2f}{marks[1]}"
+    return line
+
+
+def compare(report, baseline):
+    if report["params"] != baseline["params"]:
+        print(f"⚠ 条件が基準値と異なります：{baseline['params']} → {report['params']}")
+    print(f"--- 基準値との比較（×{REGRESSION_RATIO} 以上に ⚠）")
+    for name, result in report["results"].items():
+        if name in baseline["results"]:
+            print(_format_line(name, result, baseline["results"][name]))
+        else:
+            print(f"{name:<18} （基準値なし）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ソルバー・データ層・取り込みのベンチマーク")
+    parser.add_argument("--scale", choices=SCALES, default="default", help="ロースターの規模")
+    parser.add_argument("--characters", type=int, help="キャラ数（--scale より優先）")
+    parser.add_argument("--moves", type=int, help="1 キャラの技数（--scale より優先）")
+    parser.add_argument("--combos", type=int, help="1 キャラのコンボ数（--scale より優先）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="時間を測る回数（中央値を取る）")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, metavar="NAME", help="実行するベンチマーク")
+    parser.add_argument("--save", metavar="FILE", help="結果を JSON で保存する")
+    parser.add_argument("--compare", metavar="FILE", help="保存済みの結果（基準値）と比べる")
+    args = parser.parse_args()
+
+    n_characters, n_moves, n_combos = SCALES[args.scale]
+    report = run_benchmarks(
+        args.only or list(BENCHMARKS),
+        args.characters or n_characters,
+        args.moves or n_moves,
+        args.combos or n_combos,
+        args.seed,
+        args.repeat,
+    )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"結果を保存しました：{args.save}")
+
+
+if __name__ == "__main__":
+    main()
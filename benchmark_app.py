@@ -0,0 +1,268 @@
+"""
+benchmark_app.py
+
+step6_streamlit_ui.py を AppTest（ヘッドレス）で操作し、操作ごとの rerun について
+所要時間・実行した SQL 文の数・画面の要素数を測る。
+
+DB は frame_data.db のコピー（スキーマを最新にし、各キャラにコンボを seed 固定で追加）を使う。
+元の DB は変更しない。シナリオは同じ手順を repeat 回繰り返す。1 回目はプロセス内キャッシュが
+空の状態（cold）、2 回目以降はキャッシュ済み（warm）として別々に集計する。
+
+使い方:
+    python benchmark_app.py
+    python benchmark_app.py --combos 20 --repeat 5
+    python benchmark_app.py --save app_baseline.json
+    python benchmark_app.py --compare app_baseline.json
+    GAROU_DB_IN_MEMORY=1 python benchmark_app.py       # メモリ複製モードで測る
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+from benchmark import REGRESSION_RATIO
+from frame_migrations import migrate
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "step6_streamlit_ui.py")
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frame_data.db")
+
+# 1 回の rerun の上限（秒）
+RUN_TIMEOUT = 120
+
+# シナリオで登録してすぐ消すコンボ
+BENCH_RECIPE = "benchmark combo"
+
+
+class QueryCounter:
+    """frame_db が開く接続で実行された SQL 文を数える（トリガ内の文は数えない）"""
+
+    def __init__(self):
+        self.count = 0
+
+    def trace(self, statement):
+        if not statement.startswith("--"):
+            self.count += 1
+
+    def install(self, frame_db):
+        connect = frame_db._connect
+
+        def traced_connect(memory=False):
+            conn = connect(memory)
+            conn.set_trace_callback(self.trace)
+            return conn
+
+        frame_db._connect = traced_connect
+
+
+def seed_db(source, path, n_combos, seed):
+    """source をコピーしてスキーマを最新にし、各キャラにコンボを追加する"""
+    shutil.copy(source, path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        migrate(conn)
+        characters = [row[0] for row in conn.execute("SELECT id FROM characters ORDER BY id")]
+        conn.executemany(
+            "INSERT INTO combo_data (character_id, recipe, advantage) VALUES (?, ?, ?)",
+            [
+                (char_id, f"seed combo {n}", rng.randint(30, 90))
+                for char_id in characters
+                for n in range(n_combos)
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _count_elements(block):
+    children = getattr(block, "children", None)
+    if children is None:
+        return 1
+    return sum(_count_elements(child) for child in children.values())
+
+
+# シナリオ（操作名, 操作）。操作はウィジェットに値を入れて rerun まで行う
+# state は 1 回のシナリオの中で操作どうしが受け渡す値
+def _select_character(at, state):
+    box = _widget(at.selectbox, "自キャラを選択")
+    box.set_value(box.options[1]).run()
+
+
+def _select_action1(at, state):
+    box = _widget(at.selectbox, "🔧 自由選択1")
+    box.set_value(box.options[-1]).run()
+
+
+def _select_action2(at, state):
+    box = _widget(at.selectbox, "🔧 自由選択2")
+    box.set_value(box.options[len(box.options) // 2]).run()
+
+
+def _select_opponent(at, state):
+    box = _widget(at.selectbox, "相手キャラを選択")
+    box.set_value(box.options[2]).run()
+
+
+def _register_combo(at, state):
+    _widget(at.text_input, "コンボレシピ（自由記述）").set_value(BENCH_RECIPE)
+    _widget(at.number_input, "有利フレーム").set_value(50)
+    _widget(at.button, "登録する").click().run()
+
+
+def _delete_combo(at, state):
+    box = _widget(at.selectbox, "編集するコンボ")
+    box.set_value(next(opt for opt in box.options if BENCH_RECIPE in opt)).run()
+    _widget(at.button, "🗑 削除").click().run()
+
+
+def _add_meaty_move(at, state):
+    box = _widget(at.selectbox, "登録したい技")
+    state["meaty"] = box.options[0]
+    box.set_value(box.options[0])
+    _widget(at.button, "➕ 追加").click().run()
+
+
+def _delete_meaty_move(at, state):
+    _widget(at.multiselect, "🗑 削除する技を選択").set_value([state["meaty"]])
+    _widget(at.button, "🚮 削除").click().run()
+
+
+def _table_view(at, state):
+    _widget(at.radio, "表示形式").set_value("表").run()
+
+
+def _sequence_search(at, state):
+    _widget(at.number_input, "調整に使う最大技数").set_value(3).run()
+
+
+SCENARIO = [
+    ("初回表示", lambda at, state: at.run()),
+    ("自キャラ変更", _select_character),
+    ("自由選択1 変更", _select_action1),
+    ("自由選択2 変更", _select_action2),
+    ("相手キャラ変更", _select_opponent),
+    ("コンボ登録", _register_combo),
+    ("コンボ削除", _delete_combo),
+    ("詐欺重ね技追加", _add_meaty_move),
+    ("詐欺重ね技削除", _delete_meaty_move),
+    ("表形式に切替", _table_view),
+    ("3 技探索", _sequence_search),
+]
+
+
+def run_scenario(counter):
+    """シナリオを 1 回通し、操作ごとの {"seconds", "queries", "elements"} を返す"""
+    at = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT)
+    state = {}
+    results = {}
+    for name, action in SCENARIO:
+        counter.count = 0
+        start = time.perf_counter()
+        action(at, state)
+        seconds = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "queries": counter.count,
+            "elements": _count_elements(at.main) + _count_elements(at.sidebar),
+        }
+    return results
+
+
+def run_benchmark(db, n_combos, seed, repeat):
+    set_log_level("error")
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "frame_data.db")
+    seed_db(db, path, n_combos, seed)
+
+    # frame_db は import 時に DB のパスを読む（アプリも同じモジュールを使う）
+    os.environ["GAROU_DB_PATH"] = path
+    import frame_db
+
+    counter = QueryCounter()
+    counter.install(frame_db)
+
+    passes = [run_scenario(counter) for _ in range(repeat)]
+    results = {}
+    for name, _ in SCENARIO:
+        cold, warm = passes[0][name], [p[name] for p in passes[1:]] or [passes[0][name]]
+        results[name] = {
+            "cold_s": cold["seconds"],
+            "warm_s": round(statistics.median(p["seconds"] for p in warm), 4),
+            "cold_queries": cold["queries"],
+            "warm_queries": warm[-1]["queries"],
+            "elements": warm[-1]["elements"],
+        }
+    return {
+        "params": {
+            "db": os.path.basename(db),
+            "combos": n_combos,
+            "seed": seed,
+            "repeat": repeat,
+            "in_memory": frame_db.IN_MEMORY,
+        },
+        "results": results,
+    }
+
+
+def _format_line(name, result, baseline=None):
+    line = (
+        f"{name:<14} cold {result['cold_s']:>8.3f}s  warm {result['warm_s']:>8.3f}s"
+        f"  SQL {result['cold_queries']:>4}/{result['warm_queries']:<4}  要素 {result['elements']:>5}"
+    )
+    if baseline is not None:
+        ratios = [
+            result[key] / baseline[key] if baseline[key] else 1.0
+            for key in ("warm_s", "warm_queries", "elements")
+        ]
+        marks = ["⚠" if r >= REGRESSION_RATIO else " " for r in ratios]
+        line += f"   warm ×{ratios[0]:.2f}{marks[0]}  SQL ×{ratios[1]:.2f}{marks[1]}  要素 ×{ratios[2]:.2f}{marks[2]}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 画面の rerun ごとの所要時間・SQL 数・要素数を測る")
+    parser.add_argument("--db", default=DEFAULT_DB, help="元にする DB（コピーして使う）")
+    parser.add_argument("--combos", type=int, default=10, help="各キャラに追加するコンボ数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="シナリオを通す回数（1 回目が cold）")
+    parser.add_argument("--save", metavar="FILE", help="結果を JSON で保存する")
+    parser.add_argument("--compare", metavar="FILE", help="保存済みの結果（基準値）と比べる")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.db, args.combos, args.seed, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["params"] != report["params"]:
+            print(f"⚠ 条件が基準値と異なります：{baseline['params']} → {report['params']}")
+        print(f"（基準値との比較。×{REGRESSION_RATIO} 以上に ⚠）")
+
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name) if baseline else None
+        print(_format_line(name, result, base))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"結果を保存しました：{args.save}")
+
+
+if __name__ == "__main__":
+    main()
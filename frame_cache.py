@@ -0,0 +1,93 @@
+"""
+frame_cache.py
+
+プロセス内キャッシュ。
+VersionedCache は (テーブル, キャラ, 種別) ごとに、読み込んだ時点の
+データバージョンと一緒に値を保持する。バージョンが変わっていれば読み直す。
+LRUCache は調整結果のメモ化用（件数上限付き）。
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class VersionedCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """キーのバージョンが一致すれば値、そうでなければ None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+
+    def invalidate(self, table, character):
+        """(table, character) で始まるキーだけを捨てる"""
+        with self._lock:
+            for key in [k for k in self._entries if k[:2] == (table, character)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LRUCache:
+    """件数上限付きの LRU。ヒット／ミス数を数える"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._entries)
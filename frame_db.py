@@ -0,0 +1,434 @@
+"""
+frame_db.py
+
+frame_data.db へのアクセス層。
+接続は st.cache_resource で共有し、読み取りは接続プールから 1 本借りて返す
+（rerun ごとにスクリプトのスレッドが変わっても使い回す）。
+書き込みはロックで直列化した 1 本に集約する（WAL + busy_timeout）。
+
+キャラは characters テーブルの整数 id で参照する（各関数の引数は英語名のまま）。
+キャラ別の読み取り結果は data_versions テーブルのバージョンと一緒に
+プロセス内にキャッシュする。バージョンは各テーブルのトリガで上がるので、
+ingest など別プロセスからの書き込みも検知できる。
+
+GAROU_DB_IN_MEMORY=1 のときは起動時に DB 全体をメモリ（memdb）へ複製し、
+読み取りはすべてメモリから行う。書き込みはディスクとメモリの両方に流す。
+別プロセスによるディスクの更新は一定間隔で確かめ、あれば複製し直す。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from adjustment_cache import (
+    is_adjustment_cache_fresh,
+    load_move_table,
+    lookup_adjustments_batch,
+    rebuild_adjustment_cache,
+)
+from adjustment_solver import NO_MATCH, TotalIndex
+from frame_cache import VersionedCache
+from frame_ingest import character_id
+from frame_metrics import METRICS
+from frame_migrations import check_query_plans, migrate
+from frame_pool import ConnectionPool
+
+DB_PATH = os.environ.get("GAROU_DB_PATH", r"frame_data.db")
+
+# ロック待ちの上限（ミリ秒）
+BUSY_TIMEOUT_MS = 5000
+
+# 読み取りをメモリ上の複製から行う（遅いディスク・ネットワークドライブ向け）
+IN_MEMORY = os.environ.get("GAROU_DB_IN_MEMORY") == "1"
+
+# 読み取り接続のプールに置いておく本数（同時に読むセッションがこれより多いときは一時的に開いて閉じる）
+READ_POOL_SIZE = 8
+
+# メモリ複製のとき、別プロセスによるディスクの更新を確かめる間隔（秒）
+MEMORY_REFRESH_SEC = 5.0
+
+# プロセス内で共有するメモリ DB（「/」で始まる名前の memdb は同じプロセスの接続間で共有される）
+_MEMORY_URI = f"file:/garou_frame_{os.getpid()}?vfs=memdb"
+
+# バージョン管理するテーブル（いずれも character_id 列を持つ）
+VERSIONED_TABLES = ("frame_data", "combo_data", "meaty_moves")
+
+
+def _connect(memory=False):
+    METRICS.inc("db_connections_total")
+    if memory:
+        conn = sqlite3.connect(_MEMORY_URI, uri=True, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class _Writer:
+    def __init__(self):
+        self.conn = _connect()
+        self.lock = threading.Lock()
+        # メモリ複製（IN_MEMORY のときだけ）。この接続が開いている間メモリ DB が残る
+        self.memory = None
+        self.disk_version = None
+        self.checked_at = 0.0
+        if IN_MEMORY:
+            self.memory = _connect(memory=True)
+            self.load_memory()
+
+    def load_memory(self):
+        """ディスクの DB 全体をメモリへ複製する（lock を持った状態で呼ぶ）"""
+        # memdb は WAL の DB を開けないので、ヘッダの WAL 指定（18, 19 バイト目）を外してから写す
+        image = bytearray(self.conn.serialize())
+        image[18:20] = b"\x01\x01"
+        staging = sqlite3.connect(":memory:")
+        try:
+            staging.deserialize(bytes(image))
+            staging.backup(self.memory)
+        finally:
+            staging.close()
+        # data_version はほかの接続（別プロセス）が commit したときだけ変わる
+        self.disk_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.checked_at = time.monotonic()
+
+    def refresh_memory(self):
+        """前回の確認から MEMORY_REFRESH_SEC 経っていれば、ディスクの更新を確かめて複製し直す"""
+        if time.monotonic() - self.checked_at < MEMORY_REFRESH_SEC:
+            return
+        with self.lock:
+            if time.monotonic() - self.checked_at < MEMORY_REFRESH_SEC:
+                return
+            if self.conn.execute("PRAGMA data_version").fetchone()[0] != self.disk_version:
+                self.load_memory()
+            else:
+                self.checked_at = time.monotonic()
+
+
+class _WriteThrough:
+    """同じ書き込みをディスクとメモリの両方に流す（戻り値はディスク側）"""
+
+    def __init__(self, disk, memory):
+        self.disk = disk
+        self.memory = memory
+
+    def execute(self, sql, params=()):
+        self.memory.execute(sql, params)
+        return self.disk.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self.memory.executemany(sql, seq_of_params)
+        return self.disk.executemany(sql, seq_of_params)
+
+    def commit(self):
+        self.disk.commit()
+        self.memory.commit()
+
+    def rollback(self):
+        self.disk.rollback()
+        self.memory.rollback()
+
+
+@st.cache_resource
+def _read_pool():
+    return ConnectionPool(lambda: _connect(memory=IN_MEMORY), READ_POOL_SIZE)
+
+
+@st.cache_resource
+def _writer():
+    return _Writer()
+
+
+@st.cache_resource
+def _frame_cache():
+    return VersionedCache()
+
+
+def get_frame_cache_stats():
+    return _frame_cache().stats()
+
+
+@contextmanager
+def read_connection():
+    """プールから読み取り接続を借りる（with を抜けると返す）"""
+    if IN_MEMORY:
+        _writer().refresh_memory()
+    with _read_pool().connection() as conn:
+        yield conn
+
+
+@contextmanager
+def write_transaction():
+    """共有の書き込み接続を排他で借り、抜けるときに commit（例外時は rollback）"""
+    writer = _writer()
+    with writer.lock:
+        conn = writer.conn if writer.memory is None else _WriteThrough(writer.conn, writer.memory)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+@st.cache_resource
+def initialize_db():
+    """WAL・スキーマ移行・トリガ・実行計画の確認。プロセスで 1 回だけ行う（rerun では何もしない）"""
+    with write_transaction() as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+        # スキーマは user_version で管理（frame_migrations）。よく使うクエリが索引を使うことも確認する
+        migrate(conn)
+        _create_version_triggers(conn)
+        check_query_plans(conn)
+    return True
+
+
+def _create_version_triggers(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions(
+            tbl       TEXT NOT NULL,
+            character TEXT NOT NULL,
+            version   INTEGER NOT NULL,
+            PRIMARY KEY (tbl, character)
+        )
+        """
+    )
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    bump = (
+        "INSERT INTO data_versions (tbl, character, version) "
+        "VALUES ('{tbl}', (SELECT name FROM characters WHERE id = {row}.character_id), 1) "
+        "ON CONFLICT (tbl, character) DO UPDATE SET version = version + 1;"
+    )
+    for tbl in VERSIONED_TABLES:
+        if tbl not in existing:
+            continue
+        for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+            body = " ".join(bump.format(tbl=tbl, row=row) for row in rows)
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {tbl}_version_{event.lower()} "
+                f"AFTER {event} ON {tbl} BEGIN {body} END"
+            )
+
+
+def get_data_version(table, character):
+    with read_connection() as conn:
+        row = conn.execute(
+            "SELECT version FROM data_versions WHERE tbl = ? AND character = ?",
+            (table, character),
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def _read_sql(sql, params=None):
+    with read_connection() as conn:
+        return pd.read_sql(sql, conn, params=params)
+
+
+def _cached(table, character, kind, load):
+    """バージョンが変わっていなければメモリから返す（戻り値は共有なので変更しないこと）"""
+    cache = _frame_cache()
+    version = get_data_version(table, character)
+    key = (table, character, kind)
+    value = cache.get(key, version)
+    # 計測のラベルは種別名だけ（get_frame_data の is_opponent などは区別しない）
+    label = kind[0] if isinstance(kind, tuple) else kind
+    METRICS.inc("frame_cache_requests_total", kind=label, result="miss" if value is None else "hit")
+    if value is None:
+        with METRICS.time("db_load_seconds", kind=label):
+            value = load()
+        cache.put(key, version, value)
+        # TotalIndex は load の中で数える（adjustment_cache の確認など行を返さない値は数えない）
+        if isinstance(value, pd.DataFrame):
+            METRICS.inc("db_rows_read_total", len(value), kind=label)
+    return value
+
+
+def _combo_character(conn, combo_id):
+    row = conn.execute(
+        "SELECT c.name FROM combo_data d JOIN characters c ON c.id = d.character_id WHERE d.id = ?",
+        (combo_id,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+@st.cache_data
+def get_character_name_maps():
+    df = _read_sql(
+        """
+        SELECT n.english_name, n.japanese_name
+        FROM character_names n JOIN characters c ON c.name = n.english_name
+        ORDER BY n.id
+        """
+    )
+    eng_to_jp = dict(zip(df["english_name"], df["japanese_name"]))
+    jp_to_eng = dict(zip(df["japanese_name"], df["english_name"]))
+    return eng_to_jp, jp_to_eng
+
+
+@st.cache_data
+def get_japanese_character_list():
+    eng_to_jp, _ = get_character_name_maps()
+    return sorted(eng_to_jp.values())
+
+
+def get_frame_data(character, is_opponent=False):
+    def load():
+        df = _read_sql(
+            """
+            SELECT f.name, f.startup, f.guard, f.hit, f.total, f.cancel, f.low_overhead
+            FROM frame_data f JOIN characters c ON c.id = f.character_id
+            WHERE c.name = ?
+            ORDER BY f.sheet_order
+            """,
+            params=(character,),
+        )
+        if is_opponent:
+            df = df[df["startup"].notna() & (df["startup"] >= 1)].sort_values("startup")
+        return df
+
+    return _cached("frame_data", character, ("frame_data", is_opponent), load)
+
+
+def get_startup_actions(character):
+    def load():
+        df = _read_sql(
+            """
+            SELECT f.id, f.name, f.startup
+            FROM frame_data f JOIN characters c ON c.id = f.character_id
+            WHERE c.name = ? AND f.startup IS NOT NULL
+            ORDER BY f.sheet_order
+            """,
+            params=(character,),
+        )
+        return df.dropna().sort_values("startup")
+
+    return _cached("frame_data", character, "startup_actions", load)
+
+
+def register_combo(character, recipe, advantage):
+    with write_transaction() as conn:
+        conn.execute(
+            "INSERT INTO combo_data (character_id, recipe, advantage) VALUES (?, ?, ?)",
+            (character_id(conn, character), recipe, advantage),
+        )
+    _frame_cache().invalidate("combo_data", character)
+
+
+def update_combo(combo_id, new_recipe, new_advantage):
+    with write_transaction() as conn:
+        character = _combo_character(conn, combo_id)
+        conn.execute(
+            "UPDATE combo_data SET recipe = ?, advantage = ? WHERE id = ?",
+            (new_recipe, new_advantage, combo_id),
+        )
+    _frame_cache().invalidate("combo_data", character)
+
+
+def delete_combo(combo_id):
+    with write_transaction() as conn:
+        character = _combo_character(conn, combo_id)
+        conn.execute("DELETE FROM combo_data WHERE id = ?", (combo_id,))
+    _frame_cache().invalidate("combo_data", character)
+
+
+def get_combos(character):
+    def load():
+        return _read_sql(
+            """
+            SELECT d.id, d.recipe, d.advantage
+            FROM combo_data d JOIN characters c ON c.id = d.character_id
+            WHERE c.name = ?
+            ORDER BY d.id DESC
+            """,
+            params=(character,),
+        )
+
+    return _cached("combo_data", character, "combos", load)
+
+
+def register_meaty_move(character, move_id):
+    """move_id は frame_data の id（発生は frame_data から引くので保存しない）"""
+    with write_transaction() as conn:
+        conn.execute(
+            "INSERT INTO meaty_moves (character_id, move_id) VALUES (?, ?)",
+            (character_id(conn, character), move_id),
+        )
+    _frame_cache().invalidate("meaty_moves", character)
+
+
+def delete_meaty_moves(character, move_names):
+    with write_transaction() as conn:
+        char_id = character_id(conn, character)
+        conn.executemany(
+            """
+            DELETE FROM meaty_moves
+            WHERE character_id = ?
+              AND move_id IN (SELECT id FROM frame_data WHERE character_id = ? AND name = ?)
+            """,
+            [(char_id, char_id, n) for n in move_names],
+        )
+    _frame_cache().invalidate("meaty_moves", character)
+
+
+def get_meaty_moves(character):
+    def load():
+        return _read_sql(
+            """
+            SELECT f.name, f.startup
+            FROM meaty_moves m
+            JOIN characters c ON c.id = m.character_id
+            JOIN frame_data f ON f.id = m.move_id
+            WHERE c.name = ?
+            ORDER BY m.id
+            """,
+            params=(character,),
+        ).sort_values("startup")
+
+    return _cached("meaty_moves", character, "meaty_moves", load)
+
+
+def get_total_index(character: str) -> TotalIndex:
+    def load():
+        # MoveTable は索引を作るまでの一時的なもの（キャッシュするのは TotalIndex だけ）
+        with read_connection() as conn:
+            table = load_move_table(conn, character)
+        METRICS.inc("db_rows_read_total", len(table), kind="total_index")
+        return TotalIndex.from_table(table)
+
+    return _cached("frame_data", character, "total_index", load)
+
+
+def ensure_adjustment_cache(character):
+    """adjustment_cache が現在の frame_data と一致していなければ作り直す"""
+
+    def load():
+        index = get_total_index(character)
+        with read_connection() as conn:
+            fresh = is_adjustment_cache_fresh(conn, character, index)
+        if not fresh:
+            with write_transaction() as conn:
+                rebuild_adjustment_cache(conn, character, index)
+        return True
+
+    return _cached("frame_data", character, "adjustment_cache", load)
+
+
+def lookup_adjustments(character, queries):
+    """[(required_total, tolerance_plus), ...] を事前計算テーブルから引く（範囲外は None）"""
+    ensure_adjustment_cache(character)
+    with METRICS.time("db_load_seconds", kind="adjustment_lookup"):
+        with read_connection() as conn:
+            results = lookup_adjustments_batch(conn, character, queries)
+    # 事前計算テーブルの行は結果 1 件につき 1 行
+    METRICS.inc(
+        "db_rows_read_total",
+        sum(len(r) for r in results if r is not None and r != [NO_MATCH]),
+        kind="adjustment_lookup",
+    )
+    return results
@@ -0,0 +1,196 @@
+"""
+frame_ingest.py
+
+Excel → JSON で作ったキャラ別の技データを frame_data に取り込む処理。
+キャラは characters テーブルの id（character_id）で参照する。
+キャラごとに正規化済み行のハッシュを frame_sheet_hashes に保存し、
+ハッシュが変わったキャラだけを差分更新（UPDATE / INSERT / DELETE）する。
+変更のない技の id はそのまま残る。シート上の行の並びは sheet_order 列に持つ
+（追加した技の id は末尾になるので、読み出しは sheet_order 順）。
+
+guard / hit の文字列（'+1 / -6' など）は取り込み時に数値列にも分解する。
+"""
+
+import hashlib
+import json
+import math
+import re
+from functools import lru_cache
+
+from frame_metrics import METRICS
+
+FRAME_COLUMNS = ["name", "startup", "guard", "hit", "total", "cancel", "low_overhead"]
+
+# guard / hit から作る数値列（primary: 1 つ目の値、secondary: 「/」の後の値、unparsed: 読めなかった）
+ADVANTAGE_COLUMNS = [
+    "guard_primary", "guard_secondary", "guard_unparsed",
+    "hit_primary", "hit_secondary", "hit_unparsed",
+]
+
+# 値なしを表す記号（unparsed にはしない）
+_ADVANTAGE_PLACEHOLDERS = {"", "//", "---"}
+_ADVANTAGE_VALUE = re.compile(r"^([+-]?\d+)(?:\s*~\s*([+-]?\d+))?$")
+_FOOTNOTE = re.compile(r"\[[A-Z]\]")
+
+
+def _clean(value):
+    # JSON の NaN は None として扱う
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def normalize_move(move):
+    return tuple(_clean(move.get(col)) for col in FRAME_COLUMNS)
+
+
+@lru_cache(maxsize=None)
+def parse_advantage(text):
+    """'+1 / -6' → (1, -6, 0)。範囲（'-7 ~ +3'）は不利な側（小さい方）を取る
+
+    KD や注記など数値にできない部分があれば unparsed = 1。
+    """
+    if text is None:
+        return None, None, 0
+    text = _FOOTNOTE.sub("", str(text)).strip()
+    if text in _ADVANTAGE_PLACEHOLDERS:
+        return None, None, 0
+
+    parts = text.split("/")
+    values = []
+    # 3 つ目以降の値（'-48 / +3 / +2' など）は列が無いので unparsed にする
+    unparsed = 1 if len(parts) > 2 else 0
+    for part in parts[:2]:
+        match = _ADVANTAGE_VALUE.match(part.strip())
+        if match is None:
+            values.append(None)
+            unparsed = 1
+        else:
+            values.append(min(int(v) for v in match.groups() if v is not None))
+    if len(values) < 2:
+        values.append(None)
+    return values[0], values[1], unparsed
+
+
+def advantage_columns(row):
+    """正規化済みの行（FRAME_COLUMNS 順）から ADVANTAGE_COLUMNS の値を作る"""
+    move = dict(zip(FRAME_COLUMNS, row))
+    return parse_advantage(move["guard"]) + parse_advantage(move["hit"])
+
+
+def sheet_hash(moves) -> str:
+    """正規化済みの行（列順固定）から作るキャラ単位のハッシュ"""
+    rows = [normalize_move(move) for move in moves]
+    payload = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def character_id(conn, name):
+    """characters の id（無ければ追加する）"""
+    conn.execute("INSERT OR IGNORE INTO characters (name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM characters WHERE name = ?", (name,)).fetchone()[0]
+
+
+def _move_keys(names):
+    # 同名の行（「> B / D」の派生行など）は出現順で区別する
+    seen = {}
+    keys = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        keys.append((name, seen[name]))
+    return keys
+
+
+def upsert_character(conn, character, moves):
+    """1 キャラ分を差分更新し、(追加, 更新, 削除) の件数を返す
+
+    削除した技を参照する meaty_moves の行はトリガで消える。
+    """
+    char_id = character_id(conn, character)
+    existing = conn.execute(
+        f"SELECT id, sheet_order, {', '.join(FRAME_COLUMNS)} FROM frame_data "
+        "WHERE character_id = ? ORDER BY sheet_order, id",
+        (char_id,),
+    ).fetchall()
+    existing_by_key = dict(zip(_move_keys(row[2] for row in existing), existing))
+
+    new_rows = [normalize_move(move) for move in moves]
+    inserts, updates = [], []
+    for order, (key, row) in enumerate(zip(_move_keys(r[0] for r in new_rows), new_rows)):
+        old = existing_by_key.pop(key, None)
+        if old is None:
+            inserts.append((char_id, order) + row + advantage_columns(row))
+        elif tuple(old[2:]) != row or old[1] != order:
+            updates.append(row[1:] + advantage_columns(row) + (order, old[0]))
+    deletes = [(old[0],) for old in existing_by_key.values()]
+
+    columns = FRAME_COLUMNS + ADVANTAGE_COLUMNS
+    conn.executemany(
+        f"UPDATE frame_data SET {', '.join(f'{col} = ?' for col in columns[1:])}, sheet_order = ? WHERE id = ?",
+        updates,
+    )
+    conn.executemany(
+        f"INSERT INTO frame_data (character_id, sheet_order, {', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * (len(columns) + 2))})",
+        inserts,
+    )
+    conn.executemany("DELETE FROM frame_data WHERE id = ?", deletes)
+    for op, rows in (("insert", inserts), ("update", updates), ("delete", deletes)):
+        METRICS.inc("ingest_moves_total", len(rows), op=op)
+    return len(inserts), len(updates), len(deletes)
+
+
+def _bump_version(conn, character):
+    conn.execute(
+        """
+        INSERT INTO data_versions (tbl, character, version) VALUES ('frame_data', ?, 1)
+        ON CONFLICT (tbl, character) DO UPDATE SET version = version + 1
+        """,
+        (character,),
+    )
+
+
+def import_characters(conn, data):
+    """キャラ別データを取り込み、変更のあったキャラ名のリストを返す（commit は呼び出し側）
+
+    data は {"character": ..., "moves": [...], "source_hash": ...} の列（ジェネレータ可。
+    1 キャラずつ読み進める）。source_hash が無ければここで計算する。
+    data に含まれないキャラは削除する。
+    テーブルは frame_migrations.migrate で作成済みであること。
+    """
+    stored = dict(conn.execute("SELECT character, source_hash FROM frame_sheet_hashes"))
+
+    changed = []
+    present = set()
+    for char_entry in data:
+        character = char_entry["character"]
+        present.add(character)
+        digest = char_entry.get("source_hash") or sheet_hash(char_entry["moves"])
+        if stored.get(character) == digest:
+            METRICS.inc("ingest_characters_total", result="unchanged")
+            continue
+        upsert_character(conn, character, char_entry["moves"])
+        conn.execute(
+            "INSERT OR REPLACE INTO frame_sheet_hashes (character, source_hash) VALUES (?, ?)",
+            (character, digest),
+        )
+        _bump_version(conn, character)
+        METRICS.inc("ingest_characters_total", result="changed")
+        changed.append(character)
+
+    removed = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM characters WHERE id IN (SELECT DISTINCT character_id FROM frame_data)"
+        )
+        if row[0] not in present
+    ]
+    for character in removed:
+        conn.execute(
+            "DELETE FROM frame_data WHERE character_id = (SELECT id FROM characters WHERE name = ?)",
+            (character,),
+        )
+        conn.execute("DELETE FROM frame_sheet_hashes WHERE character = ?", (character,))
+        _bump_version(conn, character)
+        METRICS.inc("ingest_characters_total", result="removed")
+    return changed + removed
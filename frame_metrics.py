@@ -0,0 +1,199 @@
+"""
+frame_metrics.py
+
+取り込み（step1 / step2）・データ層・調整探索の計測値を集め、ファイルに書き出す。
+Streamlit には依存しない。プロセス内で 1 つの METRICS に集計する。
+
+- カウンタ（inc）: 累計。キャッシュのヒット／ミス、接続数、読んだ行数など
+- ゲージ（set）: 最新値。工程ごとの所要時間・処理行数・行/秒など
+- ヒストグラム（observe）: 探索・読み込みの所要時間の分布
+
+書き出し先は環境変数 GAROU_METRICS_FILE（step1 は --metrics でも指定可）。
+拡張子が .prom なら Prometheus のテキスト形式（毎回上書き）、それ以外は
+JSON Lines（書き出すたびに全体のスナップショットを 1 行追記）。
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+METRICS_FILE = os.environ.get("GAROU_METRICS_FILE")
+
+# メトリクス名の接頭辞
+PREFIX = "garou"
+
+# 所要時間のヒストグラムの境界（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    def inc(self, name, n=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    @contextmanager
+    def time(self, name, **labels):
+        """with ブロックの所要時間を observe する"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """関数の所要時間を observe するデコレータ"""
+
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    @contextmanager
+    def stage(self, job, stage, counter=None):
+        """取り込みの 1 工程。処理した行数は yield した dict の "rows" に入れる
+
+        counter を渡すと、そのカウンタが工程中に増えた分を行数にする。
+        """
+        progress = {"rows": 0}
+        before = self.counter_totals().get(counter, 0)
+        start = time.perf_counter()
+        try:
+            yield progress
+        finally:
+            seconds = time.perf_counter() - start
+            if counter is not None:
+                progress["rows"] = self.counter_totals().get(counter, 0) - before
+            self.set("stage_seconds", seconds, job=job, stage=stage)
+            self.set("stage_rows", progress["rows"], job=job, stage=stage)
+            self.set("stage_rows_per_second", progress["rows"] / seconds if seconds else 0.0, job=job, stage=stage)
+
+    def counter_totals(self):
+        """カウンタ名ごとの合計（ラベルは区別しない）"""
+        with self._lock:
+            totals = {}
+            for (name, _), value in self._counters.items():
+                totals[name] = totals.get(name, 0) + value
+            return totals
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._gauges.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "buckets": dict(zip(map(str, self.buckets), hist["buckets"])),
+                        "sum": hist["sum"],
+                        "count": hist["count"],
+                    }
+                    for (name, labels), hist in sorted(self._histograms.items())
+                ],
+            }
+
+    def to_prometheus(self):
+        snap = self.snapshot()
+        lines = []
+        typed = set()
+
+        def type_line(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for metric in snap["counters"]:
+            name = f"{PREFIX}_{metric['name']}"
+            type_line(name, "counter")
+            lines.append(f"{name}{_labels(metric['labels'])} {metric['value']}")
+        for metric in snap["gauges"]:
+            name = f"{PREFIX}_{metric['name']}"
+            type_line(name, "gauge")
+            lines.append(f"{name}{_labels(metric['labels'])} {metric['value']}")
+        for metric in snap["histograms"]:
+            name = f"{PREFIX}_{metric['name']}"
+            type_line(name, "histogram")
+            for bound, count in metric["buckets"].items():
+                lines.append(f"{name}_bucket{_labels({**metric['labels'], 'le': bound})} {count}")
+            lines.append(f"{name}_bucket{_labels({**metric['labels'], 'le': '+Inf'})} {metric['count']}")
+            lines.append(f"{name}_sum{_labels(metric['labels'])} {metric['sum']}")
+            lines.append(f"{name}_count{_labels(metric['labels'])} {metric['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, job=None):
+        if path.endswith(".prom"):
+            # 途中まで書いたファイルを読まれないよう、書き終えてから置き換える
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        else:
+            record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "job": job, **self.snapshot()}
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._flushed_at = time.monotonic()
+
+    def flush(self, job=None, path=None, min_interval=0.0):
+        """書き出し先があれば書き出す。min_interval 秒以内に書いていれば何もしない"""
+        path = path or METRICS_FILE
+        if not path or time.monotonic() - self._flushed_at < min_interval:
+            return False
+        self.write(path, job)
+        return True
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + body + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
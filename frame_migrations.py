@@ -0,0 +1,379 @@
+"""
+frame_migrations.py
+
+frame_data.db のスキーマ移行。PRAGMA user_version に適用済みの番号を持ち、
+未適用の移行だけを番号順に 1 つずつ実行する。
+移行後はアプリ／API がよく使うクエリの実行計画を EXPLAIN QUERY PLAN で確認し、
+索引を使わず表全体を走査していれば QueryPlanError にする。
+Streamlit には依存しない（step1 / step2 / step4 からも使うため）。
+"""
+
+from adjustment_cache import ensure_adjustment_cache_tables
+from frame_ingest import ADVANTAGE_COLUMNS, FRAME_COLUMNS, advantage_columns
+
+
+class QueryPlanError(RuntimeError):
+    pass
+
+
+# 各移行はその時点のスキーマを前提に書く（後の移行で変わるテーブルでも書き換えない）
+def _base_tables(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS frame_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            character TEXT,
+            name TEXT,
+            startup INTEGER,
+            guard TEXT,
+            hit TEXT,
+            total INTEGER,
+            cancel TEXT,
+            low_overhead TEXT
+        )
+        """
+    )
+    _advantage_columns(conn)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS frame_sheet_hashes (
+            character TEXT PRIMARY KEY,
+            source_hash TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            tbl TEXT NOT NULL,
+            character TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (tbl, character)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS meaty_moves(
+            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+            character TEXT NOT NULL,
+            move_name TEXT NOT NULL,
+            startup   INTEGER
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS combo_data(
+            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+            character TEXT NOT NULL,
+            recipe    TEXT NOT NULL,
+            advantage INTEGER NOT NULL
+        )
+        """
+    )
+    # 古い DB の meaty_moves には startup 列がない
+    if "startup" not in _columns(conn, "meaty_moves"):
+        conn.execute("ALTER TABLE meaty_moves ADD COLUMN startup INTEGER")
+    ensure_adjustment_cache_tables(conn)
+
+
+def _advantage_columns(conn):
+    # guard / hit の数値列を追加し、既存行を埋める
+    existing = _columns(conn, "frame_data")
+    missing = [col for col in ADVANTAGE_COLUMNS if col not in existing]
+    for col in missing:
+        if col.endswith("_unparsed"):
+            conn.execute(f"ALTER TABLE frame_data ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+        else:
+            conn.execute(f"ALTER TABLE frame_data ADD COLUMN {col} INTEGER")
+    if missing:
+        rows = conn.execute(f"SELECT id, {', '.join(FRAME_COLUMNS)} FROM frame_data").fetchall()
+        conn.executemany(
+            f"UPDATE frame_data SET {', '.join(f'{col} = ?' for col in ADVANTAGE_COLUMNS)} WHERE id = ?",
+            [advantage_columns(row[1:]) + (row[0],) for row in rows],
+        )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_frame_data_guard ON frame_data(character, guard_primary, guard_secondary, name)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_frame_data_hit ON frame_data(character, hit_primary, hit_secondary, name)"
+    )
+
+
+def _hot_query_indexes(conn):
+    # 調整候補（name, total）・起き攻め（name, startup）は表を引かずに索引だけで返す
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_frame_data_total ON frame_data(character, total, name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_frame_data_startup ON frame_data(character, startup, name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_combo_data_character ON combo_data(character)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_meaty_moves_character ON meaty_moves(character, move_name)")
+
+
+def _drop_combo_priority(conn):
+    # どこからも使われていない列（手作業で追加されたもの）
+    if "priority" in _columns(conn, "combo_data"):
+        conn.execute("ALTER TABLE combo_data DROP COLUMN priority")
+
+
+def _rebuild(conn, table, create_sql, select_sql):
+    # 新しい定義のテーブルに移し替える（id と AUTOINCREMENT の採番位置は維持）
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    conn.execute(create_sql.format(table=f"{table}_new"))
+    conn.execute(f"INSERT INTO {table}_new {select_sql}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    if seq is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (seq[0], table))
+
+
+def _normalize_characters(conn):
+    # キャラ名の文字列を characters の整数 id に置き換える。
+    # meaty_moves は技名・発生のコピーをやめ、frame_data の id（move_id）を参照する
+    conn.execute(
+        """
+        CREATE TABLE characters (
+            id   INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "character_names" in tables:
+        conn.execute("INSERT OR IGNORE INTO characters (name) SELECT english_name FROM character_names ORDER BY id")
+    for table in ("frame_data", "combo_data", "meaty_moves"):
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO characters (name)
+            SELECT character FROM {table} WHERE character IS NOT NULL GROUP BY character ORDER BY min(id)
+            """
+        )
+
+    _rebuild(
+        conn,
+        "frame_data",
+        """
+        CREATE TABLE {table} (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            character_id    INTEGER NOT NULL REFERENCES characters(id),
+            name            TEXT,
+            startup         INTEGER,
+            guard           TEXT,
+            hit             TEXT,
+            total           INTEGER,
+            cancel          TEXT,
+            low_overhead    TEXT,
+            guard_primary   INTEGER,
+            guard_secondary INTEGER,
+            guard_unparsed  INTEGER NOT NULL DEFAULT 0,
+            hit_primary     INTEGER,
+            hit_secondary   INTEGER,
+            hit_unparsed    INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        f"""
+        SELECT f.id, c.id, {', '.join(f'f.{col}' for col in FRAME_COLUMNS + ADVANTAGE_COLUMNS)}
+        FROM frame_data f JOIN characters c ON c.name = f.character
+        """,
+    )
+    _rebuild(
+        conn,
+        "combo_data",
+        """
+        CREATE TABLE {table} (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            character_id INTEGER NOT NULL REFERENCES characters(id),
+            recipe       TEXT NOT NULL,
+            advantage    INTEGER NOT NULL
+        )
+        """,
+        """
+        SELECT d.id, c.id, d.recipe, d.advantage
+        FROM combo_data d JOIN characters c ON c.name = d.character
+        """,
+    )
+    # 技名が frame_data に無くなった登録（発生がずれていたもの）は移さない
+    _rebuild(
+        conn,
+        "meaty_moves",
+        """
+        CREATE TABLE {table} (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            character_id INTEGER NOT NULL REFERENCES characters(id),
+            move_id      INTEGER NOT NULL REFERENCES frame_data(id)
+        )
+        """,
+        """
+        SELECT m.id, c.id, coalesce(
+            (SELECT min(f.id) FROM frame_data f
+             WHERE f.character_id = c.id AND f.name = m.move_name AND f.startup IS m.startup),
+            (SELECT min(f.id) FROM frame_data f
+             WHERE f.character_id = c.id AND f.name = m.move_name)
+        ) AS move_id
+        FROM meaty_moves m JOIN characters c ON c.name = m.character
+        WHERE move_id IS NOT NULL
+        """,
+    )
+
+    # 技が消えたら、それを参照する詐欺重ね技も消す
+    conn.execute(
+        """
+        CREATE TRIGGER frame_data_delete_meaty_moves AFTER DELETE ON frame_data
+        BEGIN DELETE FROM meaty_moves WHERE move_id = OLD.id; END
+        """
+    )
+    conn.execute("CREATE INDEX idx_frame_data_total ON frame_data(character_id, total, name)")
+    conn.execute("CREATE INDEX idx_frame_data_startup ON frame_data(character_id, startup, name)")
+    conn.execute(
+        "CREATE INDEX idx_frame_data_guard ON frame_data(character_id, guard_primary, guard_secondary, name)"
+    )
+    conn.execute("CREATE INDEX idx_frame_data_hit ON frame_data(character_id, hit_primary, hit_secondary, name)")
+    conn.execute("CREATE INDEX idx_combo_data_character ON combo_data(character_id)")
+    conn.execute("CREATE INDEX idx_meaty_moves_character ON meaty_moves(character_id, move_id)")
+    conn.execute("CREATE INDEX idx_meaty_moves_move ON meaty_moves(move_id)")
+
+
+def _sheet_order(conn):
+    # シート上の行の並び（0 始まり）。差分更新で追加した技は id が末尾になるため、並びは id ではなくこの列で決める
+    conn.execute("ALTER TABLE frame_data ADD COLUMN sheet_order INTEGER")
+    conn.execute(
+        """
+        UPDATE frame_data SET sheet_order = o.pos
+        FROM (SELECT id, row_number() OVER (PARTITION BY character_id ORDER BY id) - 1 AS pos FROM frame_data) o
+        WHERE o.id = frame_data.id
+        """
+    )
+    conn.execute("CREATE INDEX idx_frame_data_order ON frame_data(character_id, sheet_order)")
+    # 差分更新で末尾に足された技の並びは id からは戻せないので、次の取り込みで全キャラを照合し直す
+    conn.execute("DELETE FROM frame_sheet_hashes")
+
+
+def _reparse_advantage(conn):
+    # guard / hit の数値列を今の parse_advantage で作り直す（値が 3 つ以上ある行を unparsed にするため）
+    rows = conn.execute(f"SELECT id, {', '.join(FRAME_COLUMNS + ADVANTAGE_COLUMNS)} FROM frame_data").fetchall()
+    n = len(FRAME_COLUMNS)
+    conn.executemany(
+        f"UPDATE frame_data SET {', '.join(f'{col} = ?' for col in ADVANTAGE_COLUMNS)} WHERE id = ?",
+        [
+            advantage_columns(row[1 : n + 1]) + (row[0],)
+            for row in rows
+            if advantage_columns(row[1 : n + 1]) != tuple(row[n + 1 :])
+        ],
+    )
+
+
+# (番号, 内容, 処理)。追加するときは末尾に番号を増やして足す（既存の番号は変えない）
+MIGRATIONS = [
+    (1, "基本テーブル", _base_tables),
+    (2, "よく使うクエリの索引", _hot_query_indexes),
+    (3, "combo_data.priority の削除", _drop_combo_priority),
+    (4, "キャラ・技の整数 id 化", _normalize_characters),
+    (5, "技のシート上の並び（sheet_order）", _sheet_order),
+    (6, "guard / hit の数値列の作り直し", _reparse_advantage),
+]
+
+# 実行計画を確認するクエリ（内容, SQL, パラメータ）
+HOT_QUERIES = [
+    (
+        "フレーム表",
+        "SELECT f.name, f.startup, f.guard, f.hit, f.total, f.cancel, f.low_overhead "
+        "FROM frame_data f JOIN characters c ON c.id = f.character_id WHERE c.name = ? ORDER BY f.sheet_order",
+        ("",),
+    ),
+    (
+        "発生の早い行動",
+        "SELECT f.id, f.name, f.startup FROM frame_data f JOIN characters c ON c.id = f.character_id "
+        "WHERE c.name = ? AND f.startup IS NOT NULL ORDER BY f.sheet_order",
+        ("",),
+    ),
+    (
+        "調整候補の技",
+        "SELECT f.name, f.total, f.cancel "
+        "FROM frame_data f JOIN characters c ON c.id = f.character_id "
+        "WHERE c.name = ? ORDER BY f.sheet_order",
+        ("",),
+    ),
+    (
+        "技一覧（API）",
+        "SELECT f.name, f.total FROM frame_data f JOIN characters c ON c.id = f.character_id "
+        "WHERE c.name = ? AND f.total IS NOT NULL ORDER BY f.sheet_order",
+        ("",),
+    ),
+    (
+        "ガード時の有利不利（API）",
+        "SELECT f.name, f.guard_primary FROM frame_data f JOIN characters c ON c.id = f.character_id "
+        "WHERE c.name = ? AND f.guard_primary BETWEEN ? AND ?",
+        ("", -3, 99),
+    ),
+    (
+        "コンボ一覧",
+        "SELECT d.id, d.recipe, d.advantage FROM combo_data d JOIN characters c ON c.id = d.character_id "
+        "WHERE c.name = ? ORDER BY d.id DESC",
+        ("",),
+    ),
+    (
+        "コンボ一覧（API）",
+        "SELECT d.recipe, d.advantage FROM combo_data d JOIN characters c ON c.id = d.character_id "
+        "WHERE c.name = ? ORDER BY d.advantage DESC",
+        ("",),
+    ),
+    (
+        "詐欺重ね技",
+        "SELECT f.name, f.startup FROM meaty_moves m "
+        "JOIN characters c ON c.id = m.character_id JOIN frame_data f ON f.id = m.move_id "
+        "WHERE c.name = ? ORDER BY m.id",
+        ("",),
+    ),
+    (
+        "詐欺重ね技の削除",
+        "DELETE FROM meaty_moves WHERE character_id = ? "
+        "AND move_id IN (SELECT id FROM frame_data WHERE character_id = ? AND name = ?)",
+        (0, 0, ""),
+    ),
+    (
+        "技の削除に伴う詐欺重ね技の削除",
+        "DELETE FROM meaty_moves WHERE move_id = ?",
+        (0,),
+    ),
+    (
+        "調整候補（事前計算）",
+        "SELECT total, n_moves, first_pos, second_pos, label FROM adjustment_cache "
+        "WHERE character = ? AND total BETWEEN ? AND ?",
+        ("", 0, 0),
+    ),
+]
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """未適用の移行を実行し、適用した番号のリストを返す（commit は呼び出し側）"""
+    applied = []
+    current = schema_version(conn)
+    for version, _, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        apply(conn)
+        conn.execute(f"PRAGMA user_version = {version}")
+        applied.append(version)
+    return applied
+
+
+def explain(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_query_plans(conn):
+    """HOT_QUERIES のどれかが表の全件走査になっていれば QueryPlanError"""
+    scans = []
+    for label, sql, params in HOT_QUERIES:
+        plan = explain(conn, sql, params)
+        if any(step.startswith("SCAN ") for step in plan):
+            scans.append(f"{label}: {' / '.join(plan)}")
+    if scans:
+        raise QueryPlanError("索引を使わないクエリがあります\n" + "\n".join(scans))
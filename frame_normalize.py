@@ -0,0 +1,121 @@
+"""
+frame_normalize.py
+
+Excel のキャラシート（DataFrame）を frame_data 用の列に正規化する処理。
+セルごとの apply は使わず、pandas の文字列／数値の一括演算で変換する。
+数値に変換できなかったセル（Total の "//" など）は行単位のレポートとして返す。
+"""
+
+import numpy as np
+import pandas as pd
+
+# シートの列名 → frame_data の列名
+SHEET_COLUMNS = {
+    "Unnamed: 0": "name",
+    "Start": "startup",
+    "Guard": "guard",
+    "Hit": "hit",
+    "Total": "total",
+    "Cancel": "cancel",
+    "Low/Overhead": "low_overhead",
+}
+
+MOVE_COLUMNS = ["name", "startup", "guard", "hit", "total", "cancel", "low_overhead"]
+
+# 技名の置換（上から順に適用）
+NAME_REPLACEMENTS = [
+    (r"(?i)\bclose\b", "近"),
+    (r"(?i)\bair\b", "空中"),
+    (r"(?i)\bc\+d\b", "REVブロウ"),
+]
+
+# Low/Overhead 列の表記。該当しない値・空欄は「なし」
+LOW_OVERHEAD_LABELS = {
+    "//": "上段",
+    "low": "下段",
+    "overhead": "中段",
+}
+LOW_OVERHEAD_DEFAULT = "なし"
+
+# 整数に変換する列
+INT_COLUMNS = ["startup", "total"]
+
+# 文字列のセルで整数として受け付ける表記（int() と同じく前後の空白・符号は可。'12.5' '1e3' 'inf' は不可）
+_INT_TEXT = r"\s*[+-]?\d+\s*"
+
+# 文字列のセルを含むときの pandas の推定型
+_TEXT_DTYPES = {"string", "mixed", "mixed-integer"}
+
+# Excel の 1 行目は見出し
+_HEADER_ROWS = 1
+
+
+def convert_names(names: pd.Series) -> pd.Series:
+    """技名の置換。文字列以外の値はそのまま残す"""
+    converted = names
+    for pattern, repl in NAME_REPLACEMENTS:
+        replaced = converted.astype("object").str.replace(pattern, repl, regex=True)
+        converted = replaced.where(replaced.notna(), converted)
+    return converted
+
+
+def convert_low_overhead(values: pd.Series) -> pd.Series:
+    labels = values.astype("string").str.strip().str.lower().map(LOW_OVERHEAD_LABELS)
+    return labels.astype("object").where(labels.notna(), LOW_OVERHEAD_DEFAULT)
+
+
+def to_int_column(values: pd.Series):
+    """整数化した列（数値セルの小数は切り捨て、変換できない値は NaN）と、変換に失敗したセルのマスク
+
+    文字列のセルは整数の表記だけ、数値のセルは有限の値だけを変換できたものとする。
+    """
+    objects = values.astype("object")
+    numeric = pd.to_numeric(objects, errors="coerce").astype("float64")
+    numeric = numeric.where(np.isfinite(numeric))
+    if pd.api.types.infer_dtype(objects, skipna=True) in _TEXT_DTYPES:
+        # 文字列以外のセルは fullmatch が NaN になるので eq(False) に入らない
+        numeric = numeric.mask(objects.str.fullmatch(_INT_TEXT).eq(False))
+    failed = values.notna() & numeric.isna()
+    return np.trunc(numeric), failed
+
+
+def normalize_sheet(df: pd.DataFrame, character: str):
+    """1 シート分を正規化し、(技の DataFrame, 変換失敗のリスト) を返す
+
+    変換失敗は {"character", "row", "name", "column", "value"} の dict。
+    row は Excel 上の行番号。
+    """
+    # ターゲットコンボ（>）除去
+    df = df[~df["Unnamed: 0"].astype(str).str.startswith(">")]
+
+    # 列名標準化
+    df = df.rename(columns=SHEET_COLUMNS)
+
+    # 技名・属性変換
+    df = df.assign(
+        name=convert_names(df["name"]),
+        low_overhead=convert_low_overhead(df["low_overhead"]),
+    )
+
+    failures = []
+    has_name = df["name"].notna()
+    for col in INT_COLUMNS:
+        raw = df[col]
+        converted, failed = to_int_column(raw)
+        df = df.assign(**{col: converted})
+        for row, name, value in zip(
+            raw.index[failed & has_name], df["name"][failed & has_name], raw[failed & has_name]
+        ):
+            failures.append(
+                {
+                    "character": character,
+                    "row": int(row) + _HEADER_ROWS + 1,
+                    "name": name,
+                    "column": col,
+                    "value": str(value),
+                }
+            )
+    failures.sort(key=lambda f: (f["row"], INT_COLUMNS.index(f["column"])))
+
+    # 有効データのみ抽出
+    return df[MOVE_COLUMNS].dropna(subset=["name"]), failures
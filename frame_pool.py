@@ -0,0 +1,35 @@
+"""
+frame_pool.py
+
+SQLite の読み取り接続のプール。Streamlit には依存しない（frame_db と solver_api で使う）。
+スレッドが入れ替わっても（Streamlit の rerun、HTTP サーバのリクエストごとのスレッド）
+接続を使い回す。
+"""
+
+import queue
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """connect() で開いた接続を size 本まで取っておき、最後に返したものから貸す
+
+    同時に借りる数が size を超えた分は一時的に開き、返したときに閉じる。
+    """
+
+    def __init__(self, connect, size):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
@@ -0,0 +1,136 @@
+"""
+frame_profile.py
+
+画面の rerun ごとの計測（プロファイル表示用）。Streamlit には依存しない。
+CallProfiler は関数をラップして呼び出しごとの所要時間を記録する（入れ子の呼び出しは
+それぞれ自分の時間を含めて記録される）。接続数・読んだ行数などの累計（frame_metrics の
+カウンタ）は rerun の前後の値の差を取って使う。
+
+RerunCapture は 1 回の rerun 全体を cProfile とスタックのサンプリングで記録し、
+pstats と collapsed 形式（flamegraph.pl / speedscope で読める）のファイルに保存する。
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# スタックを採る間隔（秒）
+SAMPLE_INTERVAL = 0.005
+
+# 保存するファイル名に使わない文字
+_UNSAFE_FILENAME = re.compile(r"[^\w.-]+")
+
+
+def counter_delta(after, before):
+    """カウンタの累計同士の差（増えたものだけ）"""
+    return {name: value - before.get(name, 0) for name, value in after.items() if value != before.get(name, 0)}
+
+
+class CallProfiler:
+    """ラップした関数の呼び出しを (名前, 秒) で記録する"""
+
+    def __init__(self):
+        self.calls = []
+
+    def wrap(self, func, name=None):
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.calls.append((name, time.perf_counter() - start))
+
+        return timed
+
+    def slowest(self, n=10):
+        return sorted(self.calls, key=lambda call: call[1], reverse=True)[:n]
+
+    def summary(self):
+        """関数ごとの {"calls", "total_s", "max_s"}（合計時間の長い順）"""
+        stats = {}
+        for name, seconds in self.calls:
+            entry = stats.setdefault(name, {"calls": 0, "total_s": 0.0, "max_s": 0.0})
+            entry["calls"] += 1
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+        return dict(sorted(stats.items(), key=lambda item: item[1]["total_s"], reverse=True))
+
+
+class StackSampler:
+    """別スレッドから対象スレッドのスタックを一定間隔で採り、collapsed 形式で数える"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def collapsed(self):
+        """「呼び出し元;…;呼び出し先 回数」の行（多い順）"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RerunCapture:
+    """start したスレッドの処理を cProfile とスタックのサンプリングで記録する"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident())
+        self.started_at = time.time()
+        self.seconds = None
+
+    def start(self):
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        """start と同じスレッドで呼ぶ（cProfile はスレッドごと）"""
+        if self.seconds is None:
+            self.profile.disable()
+            self.sampler.stop()
+            self.seconds = time.time() - self.started_at
+
+    def top(self, n=25, sort="cumulative"):
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats(sort).print_stats(n)
+        return out.getvalue()
+
+    def save(self, directory, label):
+        """<日時>_<label>.pstats と .collapsed.txt を保存し、2 つのパスを返す"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        name = _UNSAFE_FILENAME.sub("_", label)
+        base = os.path.join(directory, f"{stamp}_{name}")
+        self.profile.dump_stats(f"{base}.pstats")
+        with open(f"{base}.collapsed.txt", "w", encoding="utf-8") as f:
+            f.write(self.sampler.collapsed())
+        return f"{base}.pstats", f"{base}.collapsed.txt"
@@ -7,10 +7,10 @@ const db = new sqlite3.Database('./db/frame_data.db');
 router.get('/:character', (req, res) => {
   const char = req.params.character;
   const sql = `
-    SELECT recipe, advantage
-    FROM combo_data
-    WHERE character = ?
-    ORDER BY advantage DESC
+    SELECT d.recipe, d.advantage
+    FROM combo_data d JOIN characters c ON c.id = d.character_id
+    WHERE c.name = ?
+    ORDER BY d.advantage DESC
   `;
   db.all(sql, [char], (err, rows) => {
     if (err) return res.status(500).json({ error: err.message });
@@ -22,11 +22,14 @@ router.get('/:character', (req, res) => {
 router.post('/', (req, res) => {
   const { character, recipe, advantage } = req.body;
   const sql = `
-    INSERT INTO combo_data (character, recipe, advantage)
-    VALUES (?, ?, ?)
+    INSERT INTO combo_data (character_id, recipe, advantage)
+    SELECT id, ?, ?
+    FROM characters
+    WHERE name = ?
   `;
-  db.run(sql, [character, recipe, advantage], function (err) {
+  db.run(sql, [recipe, advantage, character], function (err) {
     if (err) return res.status(500).json({ error: err.message });
+    if (this.changes === 0) return res.status(404).json({ error: 'キャラが見つかりません' });
     res.json({ id: this.lastID });
   });
 });
@@ -7,35 +7,90 @@ const db = new sqlite3.Database('./db/frame_data.db');
 router.get('/:character', (req, res) => {
   const char = req.params.character;
   const query = `
-    SELECT name, total
-    FROM frame_data
-    WHERE character = ?
+    SELECT f.name, f.total
+    FROM frame_data f JOIN characters c ON c.id = f.character_id
+    WHERE c.name = ? AND f.total IS NOT NULL
+    ORDER BY f.sheet_order
   `;
   db.all(query, [char], (err, rows) => {
     if (err) return res.status(500).json({ error: err.message });
+    res.json(rows);
+  });
+});
+
+// GET /api/frames/:character/advantage?on=guard|hit&min=N&max=N → 有利不利で絞り込んだ技
+// （guard_primary / hit_primary は取り込み時に数値化済み。例：ガード -3 以上 → on=guard&min=-3）
+router.get('/:character/advantage', (req, res) => {
+  const char = req.params.character;
+  const on = req.query.on || 'guard';
+  if (on !== 'guard' && on !== 'hit') {
+    return res.status(400).json({ error: 'on は guard か hit で指定してください' });
+  }
+  const min = req.query.min === undefined ? -9999 : parseInt(req.query.min, 10);
+  const max = req.query.max === undefined ? 9999 : parseInt(req.query.max, 10);
+  if (isNaN(min) || isNaN(max)) {
+    return res.status(400).json({ error: 'min / max は整数で指定してください' });
+  }
+
+  const sql = `
+    SELECT f.name, f.${on}_primary AS advantage, f.${on}_secondary AS secondary
+    FROM frame_data f JOIN characters c ON c.id = f.character_id
+    WHERE c.name = ? AND f.${on}_primary BETWEEN ? AND ?
+    ORDER BY f.${on}_primary DESC, f.name
+  `;
+  db.all(sql, [char, min, max], (err, rows) => {
+    if (err) return res.status(500).json({ error: err.message });
+    res.json(rows);
+  });
+});
+
+// GET /api/frames/:character/adjust?required=NN&tolerance=N → 事前計算済みの調整候補
+// （adjustment_cache は step2 の取り込み時に作成。範囲外の required は 404）
+router.get('/:character/adjust', (req, res) => {
+  const char = req.params.character;
+  const required = parseInt(req.query.required, 10);
+  const tolerance = parseInt(req.query.tolerance || '0', 10);
+  if (isNaN(required) || isNaN(tolerance) || tolerance < 0) {
+    return res.status(400).json({ error: 'required / tolerance は整数で指定してください' });
+  }
+  if (required < 0) return res.json(['該当なし']);
 
-    const cleaned = rows
-      .filter(r => r.total !== null && r.total !== "//")
-      .map(r => ({
-        name: r.name,
-        total: parseInt(r.total)
-      }))
-      .filter(r => !isNaN(r.total));
+  const metaSql = `
+    SELECT min_total, max_total
+    FROM adjustment_cache_meta
+    WHERE character = ?
+  `;
+  db.get(metaSql, [char], (err, meta) => {
+    if (err) return res.status(500).json({ error: err.message });
+    if (!meta || required < meta.min_total || required + tolerance > meta.max_total) {
+      return res.status(404).json({ error: '事前計算の範囲外です' });
+    }
 
-    res.json(cleaned);
+    const sql = `
+      SELECT label, total
+      FROM adjustment_cache
+      WHERE character = ? AND total BETWEEN ? AND ?
+      ORDER BY n_moves, first_pos, second_pos
+    `;
+    db.all(sql, [char, required, required + tolerance], (err, rows) => {
+      if (err) return res.status(500).json({ error: err.message });
+      const results = rows.map(r => `${r.label} (${r.total}F)(+${r.total - required}F)`);
+      res.json(results.length > 0 ? results : ['該当なし']);
+    });
   });
 });
 
 // GET /api/frames/characters → キャラ一覧（英語名のみ）
 router.get('/characters', (req, res) => {
   const sql = `
-    SELECT DISTINCT character
-    FROM frame_data
-    ORDER BY character
+    SELECT name
+    FROM characters
+    WHERE id IN (SELECT character_id FROM frame_data)
+    ORDER BY name
   `;
   db.all(sql, [], (err, rows) => {
     if (err) return res.status(500).json({ error: err.message });
-    res.json(rows.map(r => r.character));
+    res.json(rows.map(r => r.name));
   });
 });
 
@@ -6,11 +6,25 @@ interface Combo {
   advantage: number;
 }
 
-interface Move {
-  name: string;
-  total: number | null;
+// 調整探索の結果（solver_api.py の /api/solver/:character/adjust）
+interface Adjustment {
+  label: string;
 }
 
+interface AdjustQuery {
+  required: number;
+  count: number;
+  results: Adjustment[];
+}
+
+const SOLVER_API = 'http://localhost:3002/api/solver';
+
+// 起き攻め先（小ジャンプ / ジャンプ）の発生F
+const TARGETS = [34, 41];
+
+// 1 マスに表示する件数（残りは件数だけ出す）
+const PAGE_SIZE = 20;
+
 const jpMap: Record<string, string> = {
   DongHwan: 'ドンファン',
   Rock: 'ロック',
@@ -27,34 +41,68 @@ const jpMap: Record<string, string> = {
 const SetupAdjustList: React.FC = () => {
   const [characters, setCharacters] = useState<string[]>([]);
   const [charEng, setCharEng] = useState<string>('DongHwan');
-  const [combos, setCombos] = useState<Combo[]>([]);
-  const [moves, setMoves] = useState<Move[]>([]);
+  // どのキャラのコンボかも持つ（キャラ切替直後に前のキャラのコンボで探索しないため）
+  const [comboSet, setComboSet] = useState<{ character: string; combos: Combo[] }>({ character: '', combos: [] });
+  const [adjustments, setAdjustments] = useState<AdjustQuery[]>([]);
 
-  // キャラ一覧を取得
+  // キャラ一覧を取得（調整探索と同じ DB のキャラ名）
   useEffect(() => {
-    axios.get('http://localhost:3001/api/characters')
-      .then((res) => setCharacters(res.data))
+    axios.get<string[]>(`${SOLVER_API}/characters`)
+      .then((res) => {
+        setCharacters(res.data);
+        setCharEng((current) => (res.data.includes(current) ? current : res.data[0] || ''));
+      })
       .catch((err) => console.error('キャラ取得失敗:', err));
   }, []);
 
-  // コンボ & 技一覧を取得
+  // コンボ一覧を取得
   useEffect(() => {
     if (!charEng) return;
 
+    let cancelled = false;
     axios.get(`http://localhost:3001/api/combos/${charEng}`)
-      .then((res) => setCombos(res.data))
+      .then((res) => {
+        if (!cancelled) setComboSet({ character: charEng, combos: res.data });
+      })
       .catch((err) => console.error('コンボ取得失敗:', err));
-
-    axios.get(`http://localhost:3001/api/frames/${charEng}`)
-      .then((res) => setMoves(res.data))
-      .catch((err) => console.error('技データ取得失敗:', err));
+    return () => {
+      cancelled = true;
+    };
   }, [charEng]);
 
-  // 指定Fに合う技を探す
-  const findMoves = (target: number) => {
-    return moves
-      .filter((m) => m.total === target)
-      .map((m) => `・${m.name}（${m.total}F）`);
+  // 全コンボ × 起き攻め先の必要Fをまとめて 1 回で探索する
+  // （単発技・2 技の組み合わせ。データが変わっていなければ 304 でブラウザのキャッシュが使われる）
+  useEffect(() => {
+    setAdjustments([]);
+    if (comboSet.character !== charEng || comboSet.combos.length === 0) return;
+
+    // 後から出したリクエストの結果だけを使う（古い応答が遅れて届いても表示しない）
+    let cancelled = false;
+    const required = comboSet.combos.flatMap((combo) => TARGETS.map((target) => combo.advantage - target));
+    axios.get<{ queries: AdjustQuery[] }>(`${SOLVER_API}/${encodeURIComponent(charEng)}/adjust`, {
+      params: { required: required.join(','), tolerance: 0, limit: PAGE_SIZE }
+    })
+      .then((res) => {
+        if (!cancelled) setAdjustments(res.data.queries);
+      })
+      .catch((err) => console.error('調整探索失敗:', err));
+    return () => {
+      cancelled = true;
+    };
+  }, [charEng, comboSet]);
+
+  // 選択中のキャラのコンボ（読み込み中は空）
+  const combos = comboSet.character === charEng ? comboSet.combos : [];
+
+  // 指定Fに合う技・組み合わせ
+  const findMoves = (comboIdx: number, targetIdx: number) => {
+    const query = adjustments[comboIdx * TARGETS.length + targetIdx];
+    if (!query) return [];
+    const lines = query.results.map((r) => `・${r.label}`);
+    if (query.count > query.results.length) {
+      lines.push(`ほか ${query.count - query.results.length} 件`);
+    }
+    return lines;
   };
 
   return (
@@ -73,8 +121,8 @@ const SetupAdjustList: React.FC = () => {
       </div>
 
       {combos.map((combo, idx) => {
-        const adjust34 = findMoves(combo.advantage - 34);
-        const adjust41 = findMoves(combo.advantage - 41);
+        const adjust34 = findMoves(idx, 0);
+        const adjust41 = findMoves(idx, 1);
 
         return (
           <div
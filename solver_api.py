@@ -0,0 +1,281 @@
+"""
+solver_api.py
+
+詐欺重ね調整の探索（単発技・2 技の組み合わせ・許容幅・複数の必要 F）を JSON で返す
+ローカル HTTP サーバ。React 版（garou-ui の SetupAdjustList）から使う。
+DB は Streamlit 版と同じ frame_data.db。起動時にスキーマを最新にする以外は読むだけ。
+
+使い方:
+    python solver_api.py                       # http://localhost:3002
+    python solver_api.py --port 3002 --db frame_data.db
+
+GET /api/solver/characters
+    → ["B. Jenet", "Billy", ...]
+GET /api/solver/<キャラ英語名>/adjust?required=38,31&tolerance=0,2&limit=5
+    → {"character", "version", "queries": [{"required", "tolerance", "count", "results": [...]}]}
+    tolerance は 1 つなら全クエリ共通。limit は 1 クエリあたりの件数上限（count は全件数）。
+    results の並びと label は Streamlit 版（search_adjustments_batch）と同じ。
+
+ETag はデータバージョン（data_versions。取り込みやトリガで上がる）から作る。
+Cache-Control: no-cache なので、ブラウザは毎回 If-None-Match で確かめ、
+データが変わっていなければ 304 が返ってキャッシュ済みの本文が使われる。
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from adjustment_cache import load_total_index
+from adjustment_solver import adjustment_positions_batch, count_adjustments_batch, format_adjustment
+from frame_cache import LRUCache, VersionedCache
+from frame_migrations import migrate
+from frame_pool import ConnectionPool
+
+DEFAULT_PORT = 3002
+DEFAULT_DB = "frame_data.db"
+
+# 応答の形式を変えたら上げる（ETag に入れて古いキャッシュを使わせない）
+API_VERSION = 1
+
+CACHE_CONTROL = "no-cache"
+
+# 1 回に受け付ける必要 F の数の上限
+MAX_QUERIES = 500
+
+# 作った応答本文のメモ（キャラ × データバージョン × クエリ）の上限件数
+RESPONSE_MEMO_SIZE = 1024
+
+BUSY_TIMEOUT_MS = 5000
+
+# 読み取り接続のプールに置いておく本数
+READ_POOL_SIZE = 8
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class SolverService:
+    """DB の読み取りと探索。接続はプールから借りる（リクエストごとにスレッドが変わるため）"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._pool = ConnectionPool(self._connect, READ_POOL_SIZE)
+        self._indexes = VersionedCache()
+        self.responses = LRUCache(RESPONSE_MEMO_SIZE)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False
+        )
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _fetchall(self, sql, params=()):
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def characters(self):
+        rows = self._fetchall(
+            "SELECT name FROM characters WHERE id IN (SELECT character_id FROM frame_data) ORDER BY name"
+        )
+        return [row[0] for row in rows]
+
+    def characters_version(self):
+        rows = self._fetchall("SELECT COALESCE(SUM(version), 0) FROM data_versions WHERE tbl = 'frame_data'")
+        return rows[0][0]
+
+    def has_character(self, character):
+        return bool(self._fetchall("SELECT 1 FROM characters WHERE name = ?", (character,)))
+
+    def data_version(self, character):
+        rows = self._fetchall(
+            "SELECT version FROM data_versions WHERE tbl = 'frame_data' AND character = ?",
+            (character,),
+        )
+        return rows[0][0] if rows else 0
+
+    def index(self, character, version):
+        key = ("frame_data", character, "total_index")
+        index = self._indexes.get(key, version)
+        if index is None:
+            with self._pool.connection() as conn:
+                index = load_total_index(conn, character)
+            self._indexes.put(key, version, index)
+        return index
+
+    def solve(self, character, version, required_totals, tolerances, limit=None):
+        """必要 F ごとの {"required", "tolerance", "count", "results"}
+
+        探索と label は Streamlit 版と同じ adjustment_positions_batch / format_adjustment を使う。
+        """
+        index = self.index(character, version)
+        counts = count_adjustments_batch(index, required_totals, tolerances)
+        limits = None if limit is None else [limit] * len(required_totals)
+        positions = adjustment_positions_batch(index, required_totals, tolerances, limits)
+        return [
+            {
+                "required": required,
+                "tolerance": tolerance,
+                "count": count,
+                "results": [_adjustment(index, combo, required) for combo in combos],
+            }
+            for required, tolerance, count, combos in zip(required_totals, tolerances, counts, positions)
+        ]
+
+
+def _adjustment(index, combo, required):
+    total = sum(index.totals[i] for i in combo)
+    return {
+        "moves": [{"name": index.names[i], "total": index.totals[i]} for i in combo],
+        "total": total,
+        "diff": total - required,
+        "label": format_adjustment(index, combo, required),
+    }
+
+
+def _int_list(text, name):
+    try:
+        return [int(v) for v in text.split(",") if v.strip() != ""]
+    except ValueError:
+        raise BadRequest(f"{name} は整数（カンマ区切り）で指定してください") from None
+
+
+def parse_adjust_query(query):
+    """クエリ文字列 → (required のリスト, tolerance のリスト, limit)"""
+    params = parse_qs(query)
+    required = _int_list(params.get("required", [""])[0], "required")
+    if not required:
+        raise BadRequest("required を指定してください")
+    if len(required) > MAX_QUERIES:
+        raise BadRequest(f"required は {MAX_QUERIES} 個までです")
+
+    tolerances = _int_list(params.get("tolerance", ["0"])[0], "tolerance") or [0]
+    if len(tolerances) == 1:
+        tolerances = tolerances * len(required)
+    if len(tolerances) != len(required) or any(t < 0 for t in tolerances):
+        raise BadRequest("tolerance は 0 以上の整数を 1 つ、または required と同じ数だけ指定してください")
+
+    limit = params.get("limit", [None])[0]
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            raise BadRequest("limit は 0 以上の整数で指定してください")
+    return required, tolerances, limit
+
+
+class SolverHandler(BaseHTTPRequestHandler):
+    service: SolverService = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        try:
+            if parts == ["api", "solver", "characters"]:
+                etag = f'"{API_VERSION}-{self.service.characters_version()}"'
+                self._send_cached(etag, lambda: self.service.characters())
+            elif len(parts) == 4 and parts[:2] == ["api", "solver"] and parts[3] == "adjust":
+                self._adjust(parts[2], url.query)
+            else:
+                self._send_json(404, {"error": "見つかりません"})
+        except BadRequest as e:
+            self._send_json(400, {"error": str(e)})
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors_headers()
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.end_headers()
+
+    def _adjust(self, character, query):
+        if not self.service.has_character(character):
+            self._send_json(404, {"error": f"キャラが見つかりません：{character}"})
+            return
+        required, tolerances, limit = parse_adjust_query(query)
+        version = self.service.data_version(character)
+        etag = f'"{API_VERSION}-{version}"'
+        memo_key = (character, version, tuple(required), tuple(tolerances), limit)
+
+        def build():
+            return {
+                "character": character,
+                "version": version,
+                "queries": self.service.solve(character, version, required, tolerances, limit),
+            }
+
+        self._send_cached(etag, build, memo_key)
+
+    def _send_cached(self, etag, build, memo_key=None):
+        """If-None-Match が一致すれば 304、そうでなければ本文を作って返す"""
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self._cors_headers()
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.end_headers()
+            return
+        body = self.service.responses.get(memo_key) if memo_key is not None else None
+        if body is None:
+            body = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+            if memo_key is not None:
+                self.service.responses.put(memo_key, body)
+        self._send_body(200, body, {"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    def _send_json(self, status, payload):
+        self._send_body(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), {"Cache-Control": "no-store"})
+
+    def _send_body(self, status, body, headers):
+        self.send_response(status)
+        self._cors_headers()
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _cors_headers(self):
+        # React の開発サーバ（localhost:3000）から呼ぶ
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+
+
+def prepare_db(path):
+    """スキーマを最新にする（data_versions がない古い DB でも ETag を作れるように）"""
+    conn = sqlite3.connect(path)
+    try:
+        migrate(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="調整探索の HTTP API（React 版から使う）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=DEFAULT_DB, help="frame_data.db のパス")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"DB が見つかりません：{args.db}（先に step2 で取り込んでください）")
+    prepare_db(args.db)
+
+    SolverHandler.service = SolverService(args.db)
+    server = ThreadingHTTPServer(("localhost", args.port), SolverHandler)
+    print(f"✅ Solver API running at http://localhost:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,95 +1,175 @@
 import pandas as pd
+import argparse
 import json
 import os
-import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from adjustment_cache import refresh_adjustment_cache
+from frame_ingest import import_characters, sheet_hash
+from frame_metrics import METRICS, METRICS_FILE
+from frame_migrations import migrate
+from frame_normalize import normalize_sheet
 
 # パス設定
 excel_path = r"C:\dev\Garou_safe\Fatal Fury_ City of the Wolves Frame Data by Juicebox.xlsx"
 json_output_dir = r"C:\dev\Garou_safe\json"
 json_output_path = os.path.join(json_output_dir, "garou_frame_data.json")
+ndjson_output_path = os.path.join(json_output_dir, "garou_frame_data.ndjson")
+db_path = r"C:\dev\Garou_safe\frame_data.db"
 
-# Excel読み込み
-xls = pd.ExcelFile(excel_path)
-
-# 対象キャラシート
-character_sheets = [s for s in xls.sheet_names if s in [
+# 対象キャラ
+target_characters = [
     'B. Jenet', 'Billy', 'CR7', 'Dong Hwan', 'Gato', 'Hokutomaru',
     'Hotaru', 'Kain', 'Kevin', 'Mai', 'Marco', 'Preecha',
     'Rock', 'Salvatore', 'Terry', 'Tizoc', 'Vox'
-]]
-
-# 技名変換関数
-def convert_name(name):
-    if not isinstance(name, str):
-        return name
-    name = re.sub(r'(?i)\bclose\b', '近', name)
-    name = re.sub(r'(?i)\bair\b', '空中', name)
-    name = re.sub(r'(?i)\bc\+d\b', 'REVブロウ', name)
-    return name
-
-# Low/Overhead列の変換関数
-def convert_low_overhead(value):
-    if pd.isna(value):
-        return "なし"
-    value_str = str(value).strip().lower()
-    if value_str == "//":
-        return "上段"
-    elif value_str == "low":
-        return "下段"
-    elif value_str == "overhead":
-        return "中段"
-    else:
-        return "なし"
-
-# 全キャラデータ収集
-all_data = []
-
-for sheet in character_sheets:
-    df = xls.parse(sheet)
-
-    # ターゲットコンボ（>）除去
-    df = df[~df["Unnamed: 0"].astype(str).str.startswith(">")]
-
-    # 列名標準化
-    df = df.rename(columns={
-        "Unnamed: 0": "name",
-        "Start": "startup",
-        "Guard": "guard",
-        "Hit": "hit",
-        "Total": "total",
-        "Cancel": "cancel",
-        "Low/Overhead": "low_overhead"
-    })
-
-    # 技名・属性変換
-    df["name"] = df["name"].apply(convert_name)
-    df["low_overhead"] = df["low_overhead"].apply(convert_low_overhead)
-
-    # 数値変換
-    def to_int(val):
-        try:
-            return int(val)
-        except:
-            return None
-
-    df["startup"] = df["startup"].apply(to_int)
-    df["total"] = df["total"].apply(to_int)
-
-    # 有効データのみ抽出
-    character_data = {
-        "character": sheet,
-        "moves": df[["name", "startup", "guard", "hit", "total", "cancel", "low_overhead"]]
-        .dropna(subset=["name"])
-        .to_dict(orient="records")
-    }
+]
+
+# シート解析の並列数（None なら CPU コア数）
+max_workers = None
 
-    all_data.append(character_data)
+# ワーカーごとに開いた Excel（シートごとに開き直さない）
+_worker_xls = None
 
-# 出力フォルダがなければ作成
-os.makedirs(json_output_dir, exist_ok=True)
+def _open_workbook(path):
+    global _worker_xls
+    _worker_xls = pd.ExcelFile(path)
 
-# JSON出力
-with open(json_output_path, "w", encoding="utf-8") as f:
-    json.dump(all_data, f, indent=2, ensure_ascii=False)
+# 1 シート分の解析（ワーカープロセスで実行）
+def parse_sheet(sheet):
+    return sheet_entry(_worker_xls.parse(sheet), sheet)
 
-print(f"JSONファイルを保存しました：{json_output_path}")
+
+# 読み込んだシートから 1 キャラ分のデータと変換失敗のリストを作る
+def sheet_entry(sheet_df, sheet):
+    df, failures = normalize_sheet(sheet_df, sheet)
+    moves = df.to_dict(orient="records")
+
+    # 正規化済み行のハッシュ（step2 は変化のないキャラを読み飛ばす）
+    entry = {
+        "character": sheet,
+        "source_hash": sheet_hash(moves),
+        "moves": moves
+    }
+    return entry, failures
+
+
+# 変換失敗を集めながら、キャラのデータだけを流す（流した技の数を progress["rows"] に足す）
+def collect_failures(results, report, progress):
+    for entry, failures in results:
+        report.extend(failures)
+        progress["rows"] += len(entry["moves"])
+        yield entry
+
+
+# 変換失敗のレポート（件数の要約を表示し、指定があれば JSON に保存）
+def write_report(report, path=None):
+    counts = {}
+    for failure in report:
+        key = (failure["character"], failure["column"])
+        counts[key] = counts.get(key, 0) + 1
+    for (character, column), count in counts.items():
+        print(f"数値に変換できなかったセル：{character} / {column}：{count} 件")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"変換レポートを保存しました：{path}")
+
+
+# JSON の副出力（キャラを 1 件ずつ流しながら書く）
+def export_json(entries, json_format):
+    if json_format == "none":
+        yield from entries
+        return
+
+    # 出力フォルダがなければ作成
+    os.makedirs(json_output_dir, exist_ok=True)
+
+    if json_format == "ndjson":
+        # 1 行 1 キャラのコンパクト形式（全体をメモリに持たない）
+        with open(ndjson_output_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                yield entry
+        print(f"NDJSONファイルを保存しました：{ndjson_output_path}")
+    else:
+        all_data = []
+        for entry in entries:
+            all_data.append(entry)
+            yield entry
+        with open(json_output_path, "w", encoding="utf-8") as f:
+            json.dump(all_data, f, indent=2, ensure_ascii=False)
+        print(f"JSONファイルを保存しました：{json_output_path}")
+
+
+# SQLite へ直接取り込み（1 トランザクション、キャラごとに executemany）
+def import_to_sqlite(entries, path):
+    conn = sqlite3.connect(path)
+    try:
+        migrate(conn)
+        # entries は解析・JSON 出力と同時に流れてくるので、この工程の時間はそれらを含む
+        with METRICS.stage("step1", "frame_data", counter="ingest_moves_total"):
+            changed = import_characters(conn, entries)
+        with METRICS.stage("step1", "adjustment_cache", counter="adjustment_cache_rows_total"):
+            rebuilt = refresh_adjustment_cache(conn, changed)
+        with METRICS.stage("step1", "commit"):
+            conn.commit()
+    finally:
+        conn.close()
+    print(f"frame_data 更新：{len(changed)} キャラ / adjustment_cache 更新：{len(rebuilt)} キャラ → {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="フレーム表（Excel）を JSON / SQLite に変換します")
+    parser.add_argument(
+        "--db",
+        nargs="?",
+        const=db_path,
+        metavar="FILE",
+        help="frame_data.db に直接取り込む（step2 を経由しない。FILE 省略時は既定の DB）",
+    )
+    parser.add_argument(
+        "--json-format",
+        choices=["indent", "ndjson", "none"],
+        default="indent",
+        help="JSON の副出力形式（indent: 従来の整形 JSON / ndjson: 1 行 1 キャラ / none: 出力しない）",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="FILE",
+        help="数値に変換できなかったセルの一覧を JSON で保存する",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        default=METRICS_FILE,
+        help="工程ごとの所要時間などの計測値を書き出す（.prom なら Prometheus 形式、それ以外は JSON Lines）",
+    )
+    args = parser.parse_args()
+
+    # 対象キャラシート
+    character_sheets = [s for s in pd.ExcelFile(excel_path).sheet_names if s in target_characters]
+
+    # シートごとに並列解析。map なので出力順はシート順のまま、結果は届いた順に流す
+    with METRICS.stage("step1", "pipeline") as stage, ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_open_workbook, initargs=(excel_path,)
+    ) as pool:
+        report = []
+        entries = export_json(
+            collect_failures(pool.map(parse_sheet, character_sheets), report, stage), args.json_format
+        )
+        if args.db:
+            import_to_sqlite(entries, args.db)
+        else:
+            for _ in entries:
+                pass
+    METRICS.inc("conversion_failures_total", len(report))
+
+    write_report(report, args.report)
+    if args.metrics:
+        METRICS.flush(job="step1", path=args.metrics)
+        print(f"計測値を書き出しました：{args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,57 +2,43 @@ import json
 import sqlite3
 import os
 
+from adjustment_cache import refresh_adjustment_cache
+from frame_ingest import import_characters
+from frame_metrics import METRICS, METRICS_FILE
+from frame_migrations import migrate
+
 # JSONファイルとDBのパス設定
 json_path = r"C:\dev\Garou_safe\json\garou_frame_data.json"
 db_path = r"C:\dev\Garou_safe\frame_data.db"
 
-# JSON読み込み
-with open(json_path, "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-# SQLite接続＆カーソル取得
+# SQLite接続（スキーマを最新にしてから取り込む）
 conn = sqlite3.connect(db_path)
-cur = conn.cursor()
-
-# 既存テーブル削除（再投入用）
-cur.execute("DROP TABLE IF EXISTS frame_data")
-
-# テーブル作成
-cur.execute("""
-CREATE TABLE frame_data (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    character TEXT,
-    name TEXT,
-    startup INTEGER,
-    guard TEXT,
-    hit TEXT,
-    total INTEGER,
-    cancel TEXT,
-    low_overhead TEXT
-)
-""")
-
-# データ投入
-for char_entry in data:
-    character = char_entry["character"]
-    for move in char_entry["moves"]:
-        cur.execute("""
-        INSERT INTO frame_data (
-            character, name, startup, guard, hit, total, cancel, low_overhead
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            character,
-            move.get("name"),
-            move.get("startup"),
-            move.get("guard"),
-            move.get("hit"),
-            move.get("total"),
-            move.get("cancel"),
-            move.get("low_overhead")
-        ))
+migrate(conn)
+
+# JSON読み込み＆データ投入（シートのハッシュが変わったキャラだけ差分更新。技の id は維持される）
+# .ndjson（1 行 1 キャラ）なら 1 行ずつ読みながら取り込む（読み込みの時間は frame_data の工程に入る）
+with open(json_path, "r", encoding="utf-8") as f:
+    with METRICS.stage("step2", "load_json"):
+        if json_path.endswith(".ndjson"):
+            data = (json.loads(line) for line in f if line.strip())
+        else:
+            data = json.load(f)
+    with METRICS.stage("step2", "frame_data", counter="ingest_moves_total"):
+        changed = import_characters(conn, data)
+print(f"frame_data 更新：{len(changed)} キャラ {changed}")
+
+# 調整結果の事前計算（変更のあったキャラだけ作り直す）
+with METRICS.stage("step2", "adjustment_cache", counter="adjustment_cache_rows_total"):
+    rebuilt = refresh_adjustment_cache(conn, changed)
+print(f"adjustment_cache 更新：{len(rebuilt)} キャラ")
 
 # コミット＆クローズ
-conn.commit()
+with METRICS.stage("step2", "commit"):
+    conn.commit()
 conn.close()
 
 print(f"SQLite DB作成・データ投入完了：{db_path}")
+
+# 計測値の書き出し（環境変数 GAROU_METRICS_FILE を指定したときだけ）
+if METRICS.flush(job="step2"):
+    print(f"計測値を書き出しました：{METRICS_FILE}")
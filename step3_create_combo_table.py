@@ -1,25 +1,20 @@
 import sqlite3
 import os
 
+from frame_migrations import migrate, schema_version
+
 # DBファイルのパス
 db_path = r"C:\dev\Garou_safe\frame_data.db"
 
-# SQLite接続＆カーソル
+# SQLite接続
 conn = sqlite3.connect(db_path)
-cur = conn.cursor()
 
-# combo_data テーブル作成（なければ）
-cur.execute("""
-CREATE TABLE IF NOT EXISTS combo_data (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    character TEXT NOT NULL,
-    recipe TEXT,
-    advantage INTEGER NOT NULL
-)
-""")
+# combo_data テーブル作成（なければ）。テーブル定義は frame_migrations で管理
+migrate(conn)
 
 # 保存＆クローズ
 conn.commit()
+print(f"スキーマ：{schema_version(conn)}")
 conn.close()
 
 print(f"コンボテーブル combo_data を作成・確認完了：{db_path}")
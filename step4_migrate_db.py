@@ -0,0 +1,33 @@
+import argparse
+import sqlite3
+
+from frame_migrations import HOT_QUERIES, MIGRATIONS, check_query_plans, explain, migrate, schema_version
+
+# DBのパス設定
+db_path = r"C:\dev\Garou_safe\frame_data.db"
+
+parser = argparse.ArgumentParser(description="frame_data.db のスキーマを最新にし、よく使うクエリの実行計画を確認します")
+parser.add_argument("--db", default=db_path, metavar="FILE", help="対象の DB")
+parser.add_argument("--plans", action="store_true", help="各クエリの実行計画を表示する")
+args = parser.parse_args()
+
+# SQLite接続
+conn = sqlite3.connect(args.db)
+
+# 未適用の移行を実行
+before = schema_version(conn)
+applied = migrate(conn)
+conn.commit()
+descriptions = {version: description for version, description, _ in MIGRATIONS}
+for version in applied:
+    print(f"移行 {version}：{descriptions[version]}")
+print(f"スキーマ：{before} → {schema_version(conn)}")
+
+# 実行計画の確認（全件走査なら QueryPlanError）
+if args.plans:
+    for label, sql, params in HOT_QUERIES:
+        print(f"{label}：{' / '.join(explain(conn, sql, params))}")
+check_query_plans(conn)
+print("実行計画：すべて索引を使用")
+
+conn.close()
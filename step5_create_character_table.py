@@ -1,5 +1,7 @@
 import sqlite3
 
+from frame_migrations import migrate
+
 # DBパス
 db_path = r"C:\dev\Garou_safe\frame_data.db"
 
@@ -24,8 +26,9 @@ character_mapping = [
     ("Vox", "ヴォックス")
 ]
 
-# DB接続
+# DB接続（characters テーブルを使うのでスキーマを最新にしておく）
 conn = sqlite3.connect(db_path)
+migrate(conn)
 cur = conn.cursor()
 
 # 既存テーブルがあれば削除して作り直す
@@ -46,6 +49,9 @@ INSERT INTO character_names (english_name, japanese_name)
 VALUES (?, ?)
 """, character_mapping)
 
+# characters（frame_data などが参照するキャラの id）にも登録
+cur.execute("INSERT OR IGNORE INTO characters (name) SELECT english_name FROM character_names ORDER BY id")
+
 # 保存とクローズ
 conn.commit()
 conn.close()
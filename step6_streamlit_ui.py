@@ -1,9 +1,37 @@
 import streamlit as st
-import sqlite3
+import os
+import time
 import pandas as pd
-from itertools import combinations
 
-DB_PATH = r"frame_data.db"
+from adjustment_solver import (
+    NO_MATCH,
+    count_adjustments_batch,
+    rank_adjustments,
+    search_adjustment_sequences,
+    search_adjustments_batch,
+    search_total_classes,
+)
+from frame_cache import LRUCache
+from frame_metrics import METRICS
+from frame_profile import CallProfiler, RerunCapture, counter_delta
+from frame_db import (
+    delete_combo,
+    delete_meaty_moves,
+    get_character_name_maps,
+    get_combos,
+    get_data_version,
+    get_frame_cache_stats,
+    get_frame_data,
+    get_japanese_character_list,
+    get_meaty_moves,
+    get_startup_actions,
+    get_total_index,
+    initialize_db,
+    lookup_adjustments,
+    register_combo,
+    register_meaty_move,
+    update_combo,
+)
 
 LOW_DODGE_STARTUP = {
     "B. Jenet": 22, "Billy": 24, "CR7": 24, "Dong Hwan": 24,
@@ -14,181 +42,180 @@ LOW_DODGE_STARTUP = {
 
 LATE_TOLERANCE = 2
 
-
-def get_connection():
-    return sqlite3.connect(DB_PATH)
-
-
-def initialize_db():
-    conn = get_connection()
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS meaty_moves(
-            id        INTEGER PRIMARY KEY AUTOINCREMENT,
-            character TEXT NOT NULL,
-            move_name TEXT NOT NULL,
-            startup   INTEGER
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS combo_data(
-            id        INTEGER PRIMARY KEY AUTOINCREMENT,
-            character TEXT NOT NULL,
-            recipe    TEXT NOT NULL,
-            advantage INTEGER NOT NULL
-        )
-        """
-    )
-    cur = conn.execute("PRAGMA table_info(meaty_moves)")
-    if "startup" not in [row[1] for row in cur.fetchall()]:
-        conn.execute("ALTER TABLE meaty_moves ADD COLUMN startup INTEGER")
-    conn.commit()
-
-
-@st.cache_data
-def get_character_name_maps():
-    conn = get_connection()
-    df = pd.read_sql("SELECT english_name, japanese_name FROM character_names", conn)
-    eng_to_jp = dict(zip(df["english_name"], df["japanese_name"]))
-    jp_to_eng = dict(zip(df["japanese_name"], df["english_name"]))
-    return eng_to_jp, jp_to_eng
-
-
-@st.cache_data
-def get_japanese_character_list():
-    eng_to_jp, _ = get_character_name_maps()
-    return sorted(eng_to_jp.values())
-
-
-def get_frame_data(character, is_opponent=False):
-    conn = get_connection()
-    df = pd.read_sql(
-        """
-        SELECT name, startup, guard, hit, total, cancel, low_overhead
-        FROM frame_data WHERE character = ?
-        """,
-        conn,
-        params=(character,),
-    )
-    if is_opponent:
-        df = df[df["startup"].notna() & (df["startup"] >= 1)].sort_values("startup")
-    return df
-
-
-def get_startup_actions(character):
-    conn = get_connection()
-    df = pd.read_sql(
-        """
-        SELECT name, startup
-        FROM frame_data
-        WHERE character = ? AND startup IS NOT NULL
-        """,
-        conn,
-        params=(character,),
-    )
-    return df.dropna().sort_values("startup")
-
-
-def register_combo(character, recipe, advantage):
-    conn = get_connection()
-    conn.execute(
-        "INSERT INTO combo_data (character, recipe, advantage) VALUES (?, ?, ?)",
-        (character, recipe, advantage),
-    )
-    conn.commit()
-
-
-def update_combo(combo_id, new_recipe, new_advantage):
-    conn = get_connection()
-    conn.execute(
-        "UPDATE combo_data SET recipe = ?, advantage = ? WHERE id = ?",
-        (new_recipe, new_advantage, combo_id),
-    )
-    conn.commit()
-
-
-def delete_combo(combo_id):
-    conn = get_connection()
-    conn.execute("DELETE FROM combo_data WHERE id = ?", (combo_id,))
-    conn.commit()
-
-
-def get_combos(character):
-    conn = get_connection()
-    return pd.read_sql(
-        "SELECT id, recipe, advantage FROM combo_data WHERE character = ? ORDER BY id DESC",
-        conn,
-        params=(character,),
-    )
-
-
-def register_meaty_move(character, move_name, startup):
-    conn = get_connection()
-    conn.execute(
-        "INSERT INTO meaty_moves (character, move_name, startup) VALUES (?, ?, ?)",
-        (character, move_name, startup),
-    )
-    conn.commit()
-
-
-def delete_meaty_moves(character, move_names):
-    conn = get_connection()
-    conn.executemany(
-        "DELETE FROM meaty_moves WHERE character = ? AND move_name = ?",
-        [(character, n) for n in move_names],
-    )
-    conn.commit()
-
-
-def get_meaty_moves(character):
-    conn = get_connection()
-    return pd.read_sql(
-        "SELECT move_name AS name, startup FROM meaty_moves WHERE character = ?",
-        conn,
-        params=(character,),
-    ).sort_values("startup")
-
-
-def _format_result(desc: str, total: int, required: int) -> str:
-    diff = total - required
-    return f"{desc} ({total}F)(+{diff}F)"
-
-
-def find_adjustment_moves(character: str, required_total: int, tolerance_plus: int = 0):
-    if required_total < 0:
-        return ["該当なし"]
-
-    conn = get_connection()
-    df = pd.read_sql(
-        "SELECT name, total FROM frame_data WHERE character = ? AND total IS NOT NULL",
-        conn,
-        params=(character,),
-    ).dropna(subset=["total"])
-
-    min_total, max_total = required_total, required_total + tolerance_plus
-
-    singles = df[(df["total"] >= min_total) & (df["total"] <= max_total)]
-    single_results = [
-        _format_result(row["name"], int(row["total"]), required_total)
-        for _, row in singles.iterrows()
-    ]
-
-    pair_results = []
-    for m1, m2 in combinations(df.itertuples(index=False), 2):
-        ttl = m1.total + m2.total
-        if min_total <= ttl <= max_total:
-            pair_results.append(
-                _format_result(
-                    f"{m1.name} ({int(m1.total)}F) + {m2.name} ({int(m2.total)}F)",
-                    ttl,
-                    required_total,
-                )
+# 3 技以上の探索の上限（件数・秒は 1 マスあたり、GRID は表全体）
+SEQUENCE_MAX_RESULTS = 50
+SEQUENCE_TIME_LIMIT = 0.2
+SEQUENCE_GRID_TIME_LIMIT = 3.0
+
+# 調整結果のメモ（キャラ × 必要F × 許容幅 × データバージョン。おすすめ順はお気に入り・件数も）の上限件数
+ADJUSTMENT_MEMO_SIZE = 4096
+
+# 調整リストの 1 マスに最初に出す件数（「さらに表示」で 1 ページずつ増える）
+ADJUST_PAGE_SIZE = 5
+
+# 計測値（GAROU_METRICS_FILE）を書き出す最短の間隔（秒）
+METRICS_FLUSH_SEC = 60.0
+
+# rerun の cProfile の保存先
+PROFILE_DIR = os.environ.get("GAROU_PROFILE_DIR", "profiles")
+
+
+@st.cache_resource
+def get_adjustment_memo():
+    return LRUCache(ADJUSTMENT_MEMO_SIZE)
+
+
+@METRICS.timed("solver_seconds", call="find_adjustment_moves_batch")
+def find_adjustment_moves_batch(character: str, required_totals, tolerances=0, limits=None):
+    """メモに無いクエリだけを事前計算テーブル → バッチ探索の順で解く（重複は 1 回）
+
+    limits を渡すと各クエリの先頭 limits[i] 件だけを返す。
+    途中までしか作っていない結果はメモしない。
+    """
+    if not hasattr(tolerances, "__len__"):
+        tolerances = [tolerances] * len(required_totals)
+    if limits is None:
+        limits = [None] * len(required_totals)
+    memo = get_adjustment_memo()
+    version = get_data_version("frame_data", character)
+    queries = [(int(req), int(tol)) for req, tol in zip(required_totals, tolerances)]
+    results = [memo.get((character, req, tol, version)) for req, tol in queries]
+
+    missing = sorted({q for q, r in zip(queries, results) if r is None})
+    if missing:
+        solved_by_query = dict(zip(missing, lookup_adjustments(character, missing)))
+        for (req, tol), r in solved_by_query.items():
+            if r is not None:
+                memo.put((character, req, tol, version), r)
+
+        uncached = [q for q in missing if solved_by_query[q] is None]
+        if uncached:
+            # 同じクエリが複数マスにあれば一番多く要求された件数で解く
+            need = {}
+            for q, limit in zip(queries, limits):
+                if q not in solved_by_query or solved_by_query[q] is not None:
+                    continue
+                if q not in need:
+                    need[q] = limit
+                elif need[q] is not None:
+                    need[q] = None if limit is None else max(need[q], limit)
+            solved = search_adjustments_batch(
+                get_total_index(character),
+                [req for req, _ in uncached],
+                [tol for _, tol in uncached],
+                limits=[need[q] for q in uncached],
             )
-
-    return single_results + pair_results if single_results or pair_results else ["該当なし"]
-
+            for (req, tol), r in zip(uncached, solved):
+                solved_by_query[(req, tol)] = r
+                if need[(req, tol)] is None or len(r) < need[(req, tol)]:
+                    memo.put((character, req, tol, version), r)
+        results = [r if r is not None else solved_by_query[q] for q, r in zip(queries, results)]
+    return [r if limit is None else r[:limit] for r, limit in zip(results, limits)]
+
+
+@METRICS.timed("solver_seconds", call="rank_adjustment_moves_batch")
+def rank_adjustment_moves_batch(character: str, required_totals, tolerances, limits, favourites=()):
+    """おすすめ順の先頭 limits[i] 件。結果は (キャラ, 必要F, 許容幅, バージョン, お気に入り, 件数) でメモする"""
+    memo = get_adjustment_memo()
+    version = get_data_version("frame_data", character)
+    favourites = tuple(sorted(set(favourites)))
+    results = []
+    for req, tol, limit in zip(required_totals, tolerances, limits):
+        key = ("rank", character, int(req), int(tol), version, favourites, limit)
+        ranked = memo.get(key)
+        if ranked is None:
+            ranked = rank_adjustments(
+                get_total_index(character), int(req), int(tol), top_k=limit, favourites=favourites
+            )
+            memo.put(key, ranked)
+        results.append(ranked)
+    return results
+
+
+@METRICS.timed("solver_seconds", call="count_adjustment_moves_batch")
+def count_adjustment_moves_batch(character: str, required_totals, tolerances=0):
+    return count_adjustments_batch(get_total_index(character), required_totals, tolerances)
+
+
+def _next_adjust_page(page_key):
+    st.session_state[page_key] = st.session_state.get(page_key, 1) + 1
+
+
+@METRICS.timed("solver_seconds", call="find_adjustment_sequences_batch")
+def find_adjustment_sequences_batch(
+    character: str, required_totals, tolerances, max_moves: int = 3, allow_repeat: bool = False
+):
+    """3 技以上・繰り返しありの探索。1 マスごとと表全体の両方に時間上限を掛ける"""
+    index = get_total_index(character)
+    deadline = time.monotonic() + SEQUENCE_GRID_TIME_LIMIT
+    results = []
+    for required_total, tolerance_plus in zip(required_totals, tolerances):
+        results.append(
+            search_adjustment_sequences(
+                index,
+                required_total,
+                tolerance_plus,
+                max_moves=max_moves,
+                allow_repeat=allow_repeat,
+                max_results=SEQUENCE_MAX_RESULTS,
+                time_limit=max(0.0, min(SEQUENCE_TIME_LIMIT, deadline - time.monotonic())),
+            )
+        )
+    return results
+
+
+# プロファイル表示で時間を計る関数（DB アクセスと探索）
+PROFILED_CALLS = [
+    "initialize_db", "get_character_name_maps", "get_japanese_character_list", "get_data_version",
+    "get_combos", "get_frame_data", "get_startup_actions", "get_meaty_moves", "get_total_index",
+    "lookup_adjustments", "register_combo", "update_combo", "delete_combo",
+    "register_meaty_move", "delete_meaty_moves",
+    "search_adjustments_batch", "count_adjustments_batch", "rank_adjustments",
+    "search_adjustment_sequences", "search_total_classes",
+    "find_adjustment_moves_batch", "rank_adjustment_moves_batch",
+    "count_adjustment_moves_batch", "find_adjustment_sequences_batch",
+]
+
+
+def _hit_rate(after, before):
+    hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+    return f"{hits / (hits + misses):.0%}（{hits}/{hits + misses}）" if hits + misses else "—"
+
+
+def _request_capture():
+    st.session_state["capture_next_rerun"] = True
+
+
+def _finish_capture(label):
+    """記録中の rerun があれば止めて保存し、結果を session_state["last_capture"] に置く"""
+    capture = st.session_state.pop("active_capture", None)
+    if capture is None:
+        return
+    capture.stop()
+    st.session_state["last_capture"] = {
+        "label": label,
+        "seconds": capture.seconds,
+        "paths": capture.save(PROFILE_DIR, label),
+        "top": capture.top(),
+    }
+
+
+# 環境変数 GAROU_PROFILE=1 または URL の ?profile=1 で、この rerun の計測をサイドバーに出す
+profiler = None
+if os.environ.get("GAROU_PROFILE") == "1" or st.query_params.get("profile") == "1":
+    profiler = CallProfiler()
+    for _name in PROFILED_CALLS:
+        globals()[_name] = profiler.wrap(globals()[_name])
+    rerun_started = time.perf_counter()
+    counters_before = METRICS.counter_totals()
+    frame_stats_before = get_frame_cache_stats()
+    memo_stats_before = get_adjustment_memo().stats()
+
+    # 前の記録が st.rerun で途中終了していれば、そこまでを保存する
+    _finish_capture(st.session_state.get("selected_char", ""))
+    if st.session_state.pop("capture_next_rerun", False):
+        st.session_state["active_capture"] = RerunCapture()
+        st.session_state["active_capture"].start()
 
 initialize_db()
 st.set_page_config(layout="wide")
@@ -252,10 +279,8 @@ with col1:
     if not startup_actions.empty:
         move_to_add = st.selectbox("登録したい技", startup_actions["name"])
         if st.button("➕ 追加"):
-            startup_val = int(
-                startup_actions[startup_actions["name"] == move_to_add]["startup"].values[0]
-            )
-            register_meaty_move(my_eng, move_to_add, startup_val)
+            move_id = int(startup_actions[startup_actions["name"] == move_to_add]["id"].values[0])
+            register_meaty_move(my_eng, move_id)
             st.success(f"✅ {move_to_add} を登録しました！")
             st.rerun()
 
@@ -280,6 +305,30 @@ with col2:
 st.divider()
 st.subheader("🎯 詐欺重ね調整リスト（自由枠は 0〜+2F 許容）")
 
+col_k, col_rep, col_cls, col_view = st.columns(4)
+with col_k:
+    max_moves = st.number_input("調整に使う最大技数", min_value=1, max_value=5, value=2, step=1)
+with col_rep:
+    allow_repeat = st.checkbox("同じ技の繰り返しを許可", value=False)
+with col_cls:
+    compress_classes = st.checkbox(
+        "同じ F の技をまとめて表示", value=False, help="2 技までの探索で有効。個別の組み合わせは各マスで展開できます"
+    )
+with col_view:
+    view_mode = st.radio("表示形式", ["リスト", "表"], horizontal=True)
+
+col_sort, col_fav = st.columns([1, 3])
+with col_sort:
+    sort_mode = st.radio(
+        "並び順", ["おすすめ順", "行順"], horizontal=True, help="おすすめ順: 技数が少なく、ずれが小さく、通常技・お気に入りを含むものを上に"
+    )
+with col_fav:
+    favourites = st.multiselect(
+        "⭐ お気に入り技（おすすめ順で優先）",
+        sorted(set(get_total_index(my_eng).names)),
+        key=f"favourites_{my_eng}",
+    )
+
 base_df = meaty_moves_df if not meaty_moves_df.empty else startup_actions
 names = base_df["name"].tolist()
 
@@ -323,42 +372,158 @@ with colE:
         startup2 = 0
         st.markdown("### ---")
 
-for _, row in combos_df.iterrows():
-    adv = row["advantage"]
-    recipe = row["recipe"]
-
-    colA, colB, colC, colD, colE = st.columns(5)
-
-    with colA:
-        st.markdown(f"**{recipe}（+{adv}F） → 小ジャンプ**")
-        required = adv - 34
-        for r in find_adjustment_moves(my_eng, required):
-            st.write("- " + r)
-
-    with colB:
-        st.markdown(f"**{recipe}（+{adv}F） → ジャンプ**")
-        required = adv - 41
-        for r in find_adjustment_moves(my_eng, required):
-            st.write("- " + r)
-
-    with colC:
-        st.markdown(f"**{recipe}（+{adv}F） → 下段避け攻撃**")
-        required = adv - low_dodge_startup
-        for r in find_adjustment_moves(my_eng, required):
-            st.write("- " + r)
-
-    with colD:
-        st.markdown(f"**{recipe}（+{adv}F） → {action1}**")
-        required = adv - startup1
-        for r in find_adjustment_moves(my_eng, required, tolerance_plus=LATE_TOLERANCE):
-            st.write("- " + r)
-
-    with colE:
-        st.markdown(f"**{recipe}（+{adv}F） → {action2}**")
-        required = adv - startup2
-        for r in find_adjustment_moves(my_eng, required, tolerance_plus=LATE_TOLERANCE):
-            st.write("- " + r)
+adjust_targets = [
+    ("小ジャンプ", 34, 0),
+    ("ジャンプ", 41, 0),
+    ("下段避け攻撃", low_dodge_startup, 0),
+    (action1 if names else "", startup1, LATE_TOLERANCE),
+    (action2 if names else "", startup2, LATE_TOLERANCE),
+]
+required_grid = [
+    int(adv) - startup for adv in combos_df["advantage"] for _, startup, _ in adjust_targets
+]
+tolerance_grid = [tol for _ in range(len(combos_df)) for _, _, tol in adjust_targets]
+page_keys = [
+    f"adjust_page_{my_eng}_{combo_id}_{col_no}"
+    for combo_id in combos_df["id"]
+    for col_no in range(len(adjust_targets))
+]
+if view_mode == "表":
+    page_limits = [ADJUST_PAGE_SIZE] * len(page_keys)
+else:
+    page_limits = [st.session_state.get(key, 1) * ADJUST_PAGE_SIZE for key in page_keys]
+
+class_grid = None
+if compress_classes and max_moves <= 2:
+    total_index = get_total_index(my_eng)
+    class_grid = [
+        search_total_classes(total_index, req, tol, int(max_moves), allow_repeat)
+        for req, tol in zip(required_grid, tolerance_grid)
+    ]
+    adjust_results = [
+        [m.label(req) for m in matches] or [NO_MATCH] for matches, req in zip(class_grid, required_grid)
+    ]
+    adjust_counts = [len(matches) for matches in class_grid]
+    truncated_flags = [False] * len(adjust_results)
+elif max_moves == 2 and not allow_repeat:
+    adjust_counts = count_adjustment_moves_batch(my_eng, required_grid, tolerance_grid)
+    if sort_mode == "おすすめ順":
+        adjust_results = rank_adjustment_moves_batch(
+            my_eng, required_grid, tolerance_grid, page_limits, favourites
+        )
+    else:
+        adjust_results = find_adjustment_moves_batch(my_eng, required_grid, tolerance_grid, limits=page_limits)
+    truncated_flags = [False] * len(adjust_results)
+else:
+    sequence_results = find_adjustment_sequences_batch(
+        my_eng, required_grid, tolerance_grid, int(max_moves), allow_repeat
+    )
+    adjust_results = [lines for lines, _ in sequence_results]
+    adjust_counts = [0 if lines == [NO_MATCH] else len(lines) for lines in adjust_results]
+    truncated_flags = [truncated for _, truncated in sequence_results]
+
+
+if view_mode == "表":
+    target_headers = ["小ジャンプ", "ジャンプ", "下段避け攻撃", f"自由1: {adjust_targets[3][0]}", f"自由2: {adjust_targets[4][0]}"]
+    table_rows = []
+    for row_no in range(len(combos_df)):
+        row_cells = []
+        for col_no in range(len(adjust_targets)):
+            cell_no = row_no * len(adjust_targets) + col_no
+            shown = adjust_results[cell_no][:ADJUST_PAGE_SIZE]
+            row_cells.append(f"{adjust_counts[cell_no]}件: " + " / ".join(shown))
+        table_rows.append(row_cells)
+    st.dataframe(
+        pd.DataFrame(
+            table_rows,
+            index=[f"{recipe}（+{adv}F）" for adv, recipe in zip(combos_df["advantage"], combos_df["recipe"])],
+            columns=target_headers,
+        ),
+        use_container_width=True,
+    )
+else:
+    for row_no, (adv, recipe) in enumerate(zip(combos_df["advantage"], combos_df["recipe"])):
+        for col_no, (col, (label, _, _)) in enumerate(zip(st.columns(5), adjust_targets)):
+            cell_no = row_no * len(adjust_targets) + col_no
+            limit = page_limits[cell_no]
+            with col:
+                st.markdown(f"**{recipe}（+{adv}F） → {label}**（{adjust_counts[cell_no]}件）")
+                st.markdown("\n".join("- " + r for r in adjust_results[cell_no][:limit]))
+                if adjust_counts[cell_no] > limit:
+                    st.button(
+                        f"さらに表示（残り {adjust_counts[cell_no] - limit} 件）",
+                        key=f"more_{page_keys[cell_no]}",
+                        on_click=_next_adjust_page,
+                        args=(page_keys[cell_no],),
+                    )
+                if truncated_flags[cell_no]:
+                    st.caption("※ 件数または時間の上限で探索を打ち切りました")
+                if class_grid is not None and any(m.count() > 1 for m in class_grid[cell_no]):
+                    if st.checkbox("個別の組み合わせを表示", key=f"expand_{page_keys[cell_no]}"):
+                        st.markdown(
+                            "\n".join(
+                                "　- " + r for m in class_grid[cell_no] for r in m.expand(required_grid[cell_no])
+                            )
+                        )
+
+memo_stats = get_adjustment_memo().stats()
+for cache_name, stats in (("adjustment_memo", memo_stats), ("frame", get_frame_cache_stats())):
+    for stat in ("hits", "misses", "hit_rate", "size"):
+        METRICS.set(f"cache_{stat}", stats[stat], cache=cache_name)
+METRICS.flush(job="streamlit", min_interval=METRICS_FLUSH_SEC)
+st.caption(
+    f"調整結果キャッシュ: ヒット {memo_stats['hits']} / ミス {memo_stats['misses']}"
+    f"（{memo_stats['size']}/{memo_stats['maxsize']} 件）"
+)
 
 st.divider()
 st.subheader("📋 自キャラ フレーム表")
 st.dataframe(get_frame_data(my_eng), use_container_width=True)
+
+if profiler is not None:
+    with st.sidebar:
+        st.header("⏱ プロファイル")
+        st.caption(
+            f"この rerun：{time.perf_counter() - rerun_started:.3f} 秒 / 計測した呼び出し {len(profiler.calls)} 回"
+            "（入れ子の呼び出しはそれぞれの時間に含まれる）"
+        )
+        st.markdown("##### 遅い呼び出し")
+        st.dataframe(
+            pd.DataFrame(profiler.slowest(10), columns=["関数", "秒"]), use_container_width=True, hide_index=True
+        )
+        st.markdown("##### 関数ごとの合計")
+        st.dataframe(
+            pd.DataFrame.from_dict(profiler.summary(), orient="index").rename(
+                columns={"calls": "回数", "total_s": "合計秒", "max_s": "最大秒"}
+            ),
+            use_container_width=True,
+        )
+        # 累計の差なので、同時に動いているほかのセッションの分も含む
+        counters = counter_delta(METRICS.counter_totals(), counters_before)
+        st.markdown(
+            f"- SQLite から読んだ行：{counters.get('db_rows_read_total', 0)}\n"
+            f"- 開いた接続：{counters.get('db_connections_total', 0)}\n"
+            f"- フレーム表キャッシュのヒット率：{_hit_rate(get_frame_cache_stats(), frame_stats_before)}\n"
+            f"- 調整結果メモのヒット率：{_hit_rate(get_adjustment_memo().stats(), memo_stats_before)}"
+        )
+
+        # 「次の rerun を記録」を押した後の rerun はここまでを記録する
+        _finish_capture(my_jp)
+        st.markdown("##### cProfile")
+        st.button(
+            "🧪 次の rerun を記録",
+            on_click=_request_capture,
+            help=f"ボタンを押した直後の rerun を cProfile とスタックのサンプリングで記録し、{PROFILE_DIR} に保存します",
+        )
+        last_capture = st.session_state.get("last_capture")
+        if last_capture:
+            st.caption(f"{last_capture['label']}：{last_capture['seconds']:.3f} 秒の rerun を記録しました")
+            for path, label, mime in zip(
+                last_capture["paths"],
+                ["⬇ pstats", "⬇ collapsed stacks（flamegraph 用）"],
+                ["application/octet-stream", "text/plain"],
+            ):
+                with open(path, "rb") as f:
+                    st.download_button(label, f.read(), file_name=os.path.basename(path), mime=mime)
+            with st.expander("累積時間の上位"):
+                st.code(last_capture["top"])
@@ -15,6 +15,9 @@ import sqlite3
 import pandas as pd
 from itertools import combinations
 
+from frame_ingest import character_id
+from frame_migrations import migrate
+
 DB_PATH = r"C:\dev\Garou_safe\frame_data.db"
 
 # ──────────────────────────────────────────────────────────────
@@ -51,29 +54,24 @@ def get_connection():
 
 
 def initialize_db():
-    """meaty_moves に startup 列が無ければ追加"""
+    """スキーマを最新にする（テーブル定義は frame_migrations）"""
     conn = get_connection()
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS meaty_moves(
-            id        INTEGER PRIMARY KEY AUTOINCREMENT,
-            character TEXT    NOT NULL,
-            move_name TEXT    NOT NULL,
-            startup   INTEGER
-        )
-        """
-    )
-    cur = conn.execute("PRAGMA table_info(meaty_moves)")
-    cols = [row[1] for row in cur.fetchall()]
-    if "startup" not in cols:
-        conn.execute("ALTER TABLE meaty_moves ADD COLUMN startup INTEGER")
+    migrate(conn)
     conn.commit()
 
 
 @st.cache_data
 def get_character_name_maps():
     conn = get_connection()
-    df = pd.read_sql("SELECT english_name, japanese_name FROM character_names", conn)
+    df = pd.read_sql(
+        """
+        SELECT n.english_name, n.japanese_name
+        FROM   character_names n
+        JOIN   characters c ON c.name = n.english_name
+        ORDER BY n.id
+        """,
+        conn,
+    )
     eng_to_jp = dict(zip(df["english_name"], df["japanese_name"]))
     jp_to_eng = dict(zip(df["japanese_name"], df["english_name"]))
     return eng_to_jp, jp_to_eng
@@ -89,10 +87,12 @@ def get_frame_data(character, is_opponent=False):
     conn = get_connection()
     df = pd.read_sql(
         """
-        SELECT name, startup, guard, hit, total,
-               cancel, low_overhead
-        FROM   frame_data
-        WHERE  character = ?
+        SELECT f.name, f.startup, f.guard, f.hit, f.total,
+               f.cancel, f.low_overhead
+        FROM   frame_data f
+        JOIN   characters c ON c.id = f.character_id
+        WHERE  c.name = ?
+        ORDER BY f.sheet_order, f.id
         """,
         conn,
         params=(character,),
@@ -106,10 +106,12 @@ def get_startup_actions(character):
     conn = get_connection()
     df = pd.read_sql(
         """
-        SELECT name, startup
-        FROM   frame_data
-        WHERE  character = ?
-          AND  startup IS NOT NULL
+        SELECT f.name, f.startup
+        FROM   frame_data f
+        JOIN   characters c ON c.id = f.character_id
+        WHERE  c.name = ?
+          AND  f.startup IS NOT NULL
+        ORDER BY f.sheet_order, f.id
         """,
         conn,
         params=(character,),
@@ -121,10 +123,10 @@ def register_combo(character, recipe, advantage):
     conn = get_connection()
     conn.execute(
         """
-        INSERT INTO combo_data (character, recipe, advantage)
+        INSERT INTO combo_data (character_id, recipe, advantage)
         VALUES (?, ?, ?)
         """,
-        (character, recipe, advantage),
+        (character_id(conn, character), recipe, advantage),
     )
     conn.commit()
 
@@ -133,10 +135,11 @@ def get_combos(character):
     conn = get_connection()
     df = pd.read_sql(
         """
-        SELECT recipe, advantage
-        FROM   combo_data
-        WHERE  character = ?
-        ORDER BY id DESC
+        SELECT d.recipe, d.advantage
+        FROM   combo_data d
+        JOIN   characters c ON c.id = d.character_id
+        WHERE  c.name = ?
+        ORDER BY d.id DESC
         """,
         conn,
         params=(character,),
@@ -148,10 +151,15 @@ def register_meaty_move(character, move_name, startup):
     conn = get_connection()
     conn.execute(
         """
-        INSERT INTO meaty_moves (character, move_name, startup)
-        VALUES (?, ?, ?)
+        INSERT INTO meaty_moves (character_id, move_id)
+        SELECT character_id, id
+        FROM   frame_data
+        WHERE  character_id = ?
+          AND  name = ?
+        ORDER BY startup IS NOT ?, id
+        LIMIT 1
         """,
-        (character, move_name, startup),
+        (character_id(conn, character), move_name, startup),
     )
     conn.commit()
 
@@ -161,10 +169,10 @@ def delete_meaty_moves(character, move_names):
     conn.executemany(
         """
         DELETE FROM meaty_moves
-        WHERE  character = ?
-          AND  move_name = ?
+        WHERE  character_id = ?
+          AND  move_id IN (SELECT id FROM frame_data WHERE character_id = ? AND name = ?)
         """,
-        [(character, n) for n in move_names],
+        [(character_id(conn, character), character_id(conn, character), n) for n in move_names],
     )
     conn.commit()
 
@@ -173,9 +181,12 @@ def get_meaty_moves(character):
     conn = get_connection()
     df = pd.read_sql(
         """
-        SELECT move_name AS name, startup
-        FROM   meaty_moves
-        WHERE  character = ?
+        SELECT f.name, f.startup
+        FROM   meaty_moves m
+        JOIN   characters c ON c.id = m.character_id
+        JOIN   frame_data f ON f.id = m.move_id
+        WHERE  c.name = ?
+        ORDER BY m.id
         """,
         conn,
         params=(character,),
@@ -194,10 +205,12 @@ def find_adjustment_moves(character, required_total, tolerance=0):
     conn = get_connection()
     df = pd.read_sql(
         """
-        SELECT name, total
-        FROM   frame_data
-        WHERE  character = ?
-          AND  total IS NOT NULL
+        SELECT f.name, f.total
+        FROM   frame_data f
+        JOIN   characters c ON c.id = f.character_id
+        WHERE  c.name = ?
+          AND  f.total IS NOT NULL
+        ORDER BY f.sheet_order, f.id
         """,
         conn,
         params=(character,),